@@ -3,18 +3,27 @@
 # Usage: qxmlcodegen.py --verify <in> <out_hdr> <out_src>
 
 import argparse
+import functools
 import os
+import time
 from enum import Enum
 
-import urllib.request
 import sys
 
-from io import BytesIO, TextIOBase
+from io import BytesIO, StringIO, TextIOBase
 
 try:
-	from defusedxml.ElementTree import parse, ElementTree, Element
+	from lxml.etree import XPath, _Element as Element, iterparse as lxml_iterparse
+
+	def iterparse(source, events: tuple):
+		# drop comments and PIs like ElementTree does, and never expand entities or access the network
+		return lxml_iterparse(source, events=events, resolve_entities=False, no_network=True, remove_comments=True, remove_pis=True)
 except ImportError:
-	from xml.etree.ElementTree import parse, ElementTree, Element
+	XPath = None
+	try:
+		from defusedxml.ElementTree import iterparse, Element
+	except ImportError:
+		from xml.etree.ElementTree import iterparse, Element
 
 
 xslt_qxg_remove_query = """
@@ -30,7 +39,437 @@ xslt_qxg_remove_query = """
 """
 
 
-def xml_verify(xsd_path: str, required: bool=False):
+_HDR_BEGIN_TEMPLATE = """#ifndef {inc_guard}
+#define {inc_guard}
+
+{std_includes}#include <tuple>
+#include <exception>
+
+#include <QtCore/QString>
+#include <QtCore/QList>
+#include <QtCore/QFileDevice>
+#include <QtCore/QXmlStreamReader>
+#include <QtCore/QVariant>
+{includes}
+{ns_begin}class {class_decl}
+{{
+	Q_DISABLE_COPY({cn})
+public:
+	template <typename... TArgs>
+	using optional = {std_ns}::optional<TArgs...>;
+	template <typename... TArgs>
+	using variant = {std_ns}::variant<TArgs...>;
+	template <typename TGet, typename... TArgs>
+	static inline Q_DECL_CONSTEXPR auto get(TArgs&&... args) -> decltype({std_ns}::get<TGet>(std::forward<TArgs>(args)...)) {{
+		return {std_ns}::get<TGet>(std::forward<TArgs>(args)...);
+	}}
+
+	class Exception : public std::exception
+	{{
+	public:
+		Exception();
+
+		QString qWhat() const;
+		const char *what() const noexcept final;
+
+	protected:
+		virtual QString createQWhat() const = 0;
+
+		mutable QByteArray _qWhat;
+	}};
+
+	class FileException : public Exception
+	{{
+	public:
+		FileException(QFileDevice &device);
+
+		QString filePath() const;
+		QString errorMessage() const;
+
+	protected:
+		QString createQWhat() const override;
+
+		const QString _path;
+		const QString _error;
+	}};
+
+	class XmlException : public Exception
+	{{
+	public:
+		XmlException(QXmlStreamReader &reader, const QString &customError = {{}});
+		XmlException(QString path, qint64 line, qint64 column, QString error);
+
+		QString filePath() const;
+		qint64 line() const;
+		qint64 column() const;
+		QString errorMessage() const;
+
+	protected:
+		QString createQWhat() const override;
+
+		const QString _path;
+		const qint64 _line;
+		const qint64 _column;
+		const QString _error;
+	}};
+
+	{cn}();
+	virtual ~{cn}();
+
+"""
+
+_HDR_END_TEMPLATE = """
+	template <typename T>
+	T convertData(QXmlStreamReader &reader, const QString &data) const;
+
+	template <typename T>
+	optional<T> readOptionalAttrib(QXmlStreamReader &reader, const QString &key) const;
+	template <typename T>
+	T readOptionalAttrib(QXmlStreamReader &reader, const QString &key, const QString &defaultValue) const;
+	template <typename T>
+	T readRequiredAttrib(QXmlStreamReader &reader, const QString &key) const;
+
+	template <typename T>
+	void readContent(QXmlStreamReader &reader, T &data) const;
+
+	void checkError(QXmlStreamReader &reader) const;
+	Q_NORETURN void throwChild(QXmlStreamReader &reader) const;
+	Q_NORETURN void throwNoChild(QXmlStreamReader &reader) const;
+	Q_NORETURN void throwInvalidSimple(QXmlStreamReader &reader) const;
+	Q_NORETURN void throwSizeError(QXmlStreamReader &reader, int minValue, int currentValue, bool exactSize = false) const;
+	Q_NORETURN void throwInvalidEnum(QXmlStreamReader &reader, const QString &text) const;
+}};
+
+template <typename T>
+T {cn}::convertData(QXmlStreamReader &reader, const QString &data) const
+{{
+	Q_UNUSED(reader)
+	return QVariant{{data}}.template value<T>();
+}}
+
+template <typename T>
+{cn}::optional<T> {cn}::readOptionalAttrib(QXmlStreamReader &reader, const QString &key) const
+{{
+	if(reader.attributes().hasAttribute(key))
+		return convertData<T>(reader, reader.attributes().value(key).toString());
+	else
+		return optional<T>{{}};
+}}
+
+template <typename T>
+T {cn}::readOptionalAttrib(QXmlStreamReader &reader, const QString &key, const QString &defaultValue) const
+{{
+	if(reader.attributes().hasAttribute(key))
+		return convertData<T>(reader, reader.attributes().value(key).toString());
+	else
+		return convertData<T>(reader, defaultValue);
+}}
+
+template <typename T>
+T {cn}::readRequiredAttrib(QXmlStreamReader &reader, const QString &key) const
+{{
+	if(reader.attributes().hasAttribute(key))
+		return convertData<T>(reader, reader.attributes().value(key).toString());
+	else
+		throw XmlException{{reader, QStringLiteral("Required attribute \\"%1\\" but was not set").arg(key)}};
+}}
+
+template <typename T>
+void {cn}::readContent(QXmlStreamReader &reader, T &data) const
+{{
+	auto content = reader.readElementText(QXmlStreamReader::ErrorOnUnexpectedElement);
+	checkError(reader);
+	data = convertData<T>(reader, content);
+}}
+
+"""
+
+_SRC_BEGIN_TEMPLATE = """#include "{hdr_name}"
+#include <QtCore/QFile>
+#include <QtCore/QHash>
+#include <QtCore/QSet>
+#if QT_CONFIG(regularexpression) == 1
+#include <QtCore/QRegularExpression>
+#define XML_CODE_GEN_REGEXP QRegularExpression
+#else
+#include <QtCore/QRegExp>
+#define XML_CODE_GEN_REGEXP QRegExp
+#endif
+{schema_includes}{using_ns}{schema_handler}
+{cn}::{cn}() = default;
+
+{cn}::~{cn}() = default;
+
+"""
+
+_SRC_SCHEMA_INCLUDES = """#ifdef QT_XMLPATTERNS_LIB
+#include <QtCore/QDebug>
+#include <QtCore/QBuffer>
+#include <QtXmlPatterns/QXmlSchema>
+#include <QtXmlPatterns/QXmlSchemaValidator>
+#include <QtXmlPatterns/QXmlQuery>
+#include <QtXmlPatterns/QAbstractMessageHandler>
+#endif
+"""
+
+_SRC_SCHEMA_HANDLER_TEMPLATE = """
+#ifdef QT_XMLPATTERNS_LIB
+namespace {{
+
+class ExceptionMessageHandler : public QAbstractMessageHandler
+{{
+public:
+	explicit inline ExceptionMessageHandler(QObject *parent = nullptr) :
+		QAbstractMessageHandler{{parent}}
+	{{}}
+
+protected:
+	void handleMessage(QtMsgType type, const QString &description, const QUrl &identifier, const QSourceLocation &sourceLocation) override
+	{{
+		Q_UNUSED(identifier)
+		auto msg = description;
+		msg.remove(XML_CODE_GEN_REGEXP{{QStringLiteral("<[^>]*>")}});
+		{cn}::XmlException exception{{sourceLocation.uri().isLocalFile() ? sourceLocation.uri().toLocalFile() : sourceLocation.uri().toString(), sourceLocation.line(), sourceLocation.column(), msg}};
+		switch(type) {{
+		case QtDebugMsg:
+			qDebug() << exception.what();
+			break;
+		case QtInfoMsg:
+			qInfo() << exception.what();
+			break;
+		case QtWarningMsg:
+			qWarning() << exception.what();
+			break;
+		default:
+			throw exception;
+		}}
+	}}
+}};
+
+}}
+#endif
+"""
+
+
+# messages of the throw* helpers, emitted once as a table of constants into the generated source
+_SRC_ERROR_MESSAGES = (
+	("UnexpectedChild", "Unexpected child element: %1"),
+	("MissingChild", "Unexpected end of element \\\"%1\\\". Expected more child elements"),
+	("InvalidSimple", "Mixed content elements with a base class cannot have the base read any content"),
+	("SizeError", "Expected %1 %2 child elements, but found %3"),
+	("InvalidEnum", "Found unexpected value \\\"%1\\\" for restricted enum")
+)
+
+_SRC_ERROR_MESSAGE_TABLE = "namespace {\n\n" + \
+	"".join("const QString msg{} = QStringLiteral(\"{}\");\n".format(key, message) for key, message in _SRC_ERROR_MESSAGES) + \
+	"\n}\n\n"
+
+_SRC_END_HELPERS_TEMPLATE = """void {cn}::checkError(QXmlStreamReader &reader) const
+{{
+	if(reader.hasError())
+		throw XmlException{{reader}};
+}}
+
+void {cn}::throwChild(QXmlStreamReader &reader) const
+{{
+	throw XmlException{{reader, msgUnexpectedChild.arg(reader.name())}};
+}}
+
+void {cn}::throwNoChild(QXmlStreamReader &reader) const
+{{
+	throw XmlException{{reader, msgMissingChild.arg(reader.name())}};
+}}
+
+void {cn}::throwInvalidSimple(QXmlStreamReader &reader) const
+{{
+	throw XmlException{{reader, msgInvalidSimple}};
+}}
+
+void {cn}::throwSizeError(QXmlStreamReader &reader, int minValue, int currentValue, bool exactSize) const
+{{
+	throw XmlException{{reader, msgSizeError.arg(exactSize ? QStringLiteral("exactly") : QStringLiteral("at least"), QString::number(minValue), QString::number(currentValue))}};
+}}
+
+void {cn}::throwInvalidEnum(QXmlStreamReader &reader, const QString &text) const
+{{
+	throw XmlException{{reader, msgInvalidEnum.arg(text)}};
+}}
+
+"""
+
+_SRC_CONVERTER_BEGIN_TEMPLATE = """template <>
+{cn}::{tn} {cn}::convertData<{cn}::{tn}>(QXmlStreamReader &reader, const QString &data) const
+{{
+"""
+
+_SRC_END_TEMPLATE = """
+
+{cn}::Exception::Exception() = default;
+
+QString {cn}::Exception::qWhat() const
+{{
+	return QString::fromUtf8(what());
+}}
+
+const char *{cn}::Exception::what() const noexcept
+{{
+	if(_qWhat.isNull())
+		 _qWhat = createQWhat().toUtf8();
+	return _qWhat.constData();
+}}
+
+
+
+{cn}::FileException::FileException(QFileDevice &device) :
+	Exception{{}},
+	_path{{device.fileName()}},
+	_error{{device.errorString()}}
+{{}}
+
+QString {cn}::FileException::filePath() const
+{{
+	return _path;
+}}
+
+QString {cn}::FileException::errorMessage() const
+{{
+	return _error;
+}}
+
+QString {cn}::FileException::createQWhat() const
+{{
+	return QStringLiteral("%1: %2").arg(_path, _error);
+}}
+
+
+
+{cn}::XmlException::XmlException(QXmlStreamReader &reader, const QString &customError) :
+	Exception{{}},
+	_path{{dynamic_cast<QFileDevice*>(reader.device()) ? static_cast<QFileDevice*>(reader.device())->fileName() : QStringLiteral("<unknown>")}},
+	_line{{reader.lineNumber()}},
+	_column{{reader.columnNumber()}},
+	_error{{customError.isNull() ? reader.errorString() : customError}}
+{{}}
+
+{cn}::XmlException::XmlException(QString path, qint64 line, qint64 column, QString error) :
+	Exception{{}},
+	_path{{std::move(path)}},
+	_line{{std::move(line)}},
+	_column{{std::move(column)}},
+	_error{{std::move(error)}}
+{{}}
+
+QString {cn}::XmlException::filePath() const
+{{
+	return _path;
+}}
+
+qint64 {cn}::XmlException::line() const
+{{
+	return _line;
+}}
+
+qint64 {cn}::XmlException::column() const
+{{
+	return _column;
+}}
+
+QString {cn}::XmlException::errorMessage() const
+{{
+	return _error;
+}}
+
+QString {cn}::XmlException::createQWhat() const
+{{
+	return QStringLiteral("%1:%2:%3: %4").arg(_path, QString::number(_line), QString::number(_column), _error);
+}}
+"""
+
+
+_W3C_SCHEMA_URL = "https://www.w3.org/2009/XMLSchema/XMLSchema.xsd"
+_W3C_SCHEMA_MAX_AGE = 30 * 24 * 60 * 60
+
+
+def _w3c_schema_cache_path() -> str:
+	cache_dir = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+	return os.path.join(cache_dir, "qxmlcodegen", "XMLSchema.xsd")
+
+
+def _read_w3c_schema_cache(cache_path: str, max_age: float = None) -> bytes:
+	# returns None if there is no cached copy, or if it is older than max_age
+	try:
+		if max_age is None or time.time() - os.path.getmtime(cache_path) < max_age:
+			with open(cache_path, "rb") as cache_file:
+				return cache_file.read()
+	except OSError:
+		pass
+	return None
+
+
+@functools.lru_cache(maxsize=1)
+def _get_validator():
+	# compiling the W3C scheme is expensive, so it is only done once per process
+	import urllib.request
+	from lxml import etree
+
+	# never expand entities or fetch anything referenced by the documents themselves
+	xsd_parser = etree.XMLParser(resolve_entities=False, no_network=True, huge_tree=False, load_dtd=False)
+
+	def load_schema(content: bytes):
+		xmlschema_doc = etree.parse(BytesIO(content), xsd_parser, base_url=_W3C_SCHEMA_URL)
+		return etree.XMLSchema(xmlschema_doc)
+
+	# the W3C scheme practically never changes, so keep a local copy instead of downloading it on every run
+	cache_path = _w3c_schema_cache_path()
+	content = _read_w3c_schema_cache(cache_path, _W3C_SCHEMA_MAX_AGE)
+	if content is not None:
+		try:
+			return xsd_parser, load_schema(content)
+		except (etree.XMLSyntaxError, etree.XMLSchemaParseError):
+			pass  # a broken copy is treated like a missing one
+
+	try:
+		with urllib.request.urlopen(_W3C_SCHEMA_URL) as xsd_schema_req:
+			content = xsd_schema_req.read()
+	except urllib.error.URLError as rexc:
+		# fall back to an outdated copy if there is a usable one
+		content = _read_w3c_schema_cache(cache_path)
+		if content is None:
+			raise
+		try:
+			return xsd_parser, load_schema(content)
+		except (etree.XMLSyntaxError, etree.XMLSchemaParseError):
+			raise rexc
+
+	xmlschema = load_schema(content)
+	try:
+		os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+		# always replaced, as the mtime of the copy is what marks it as fresh
+		_write_file(cache_path, content, keep_unchanged=False)
+	except OSError as oexc:
+		print("Unable to cache the W3C XSD scheme:", oexc, file=sys.stderr)
+	return xsd_parser, xmlschema
+
+
+def _strip_qxg(tree):
+	# removes all qxg elements and attributes in place, leaving only the plain XSD to be validated
+	from lxml import etree
+
+	qxg_ns = "{" + XmlCodeGenerator.ns_map["qxg"] + "}"
+	qxg_nodes = []
+	for node in tree.iter(etree.Element):
+		if node.tag.startswith(qxg_ns):
+			qxg_nodes.append(node)
+		else:
+			for key in [key for key in node.attrib if key.startswith(qxg_ns)]:
+				del node.attrib[key]
+	for node in qxg_nodes:
+		parent = node.getparent()
+		if parent is not None:
+			parent.remove(node)
+
+
+def xml_verify(xsd_path: str, required: bool=False, xsd_data: bytes=None):
 	try:
 		from lxml import etree
 	except ImportError as iexc:
@@ -39,21 +478,91 @@ def xml_verify(xsd_path: str, required: bool=False):
 		else:
 			print("Skipping XSD validation because of unavailable module:", iexc, file=sys.stderr)
 			return
-
-	xslt_clear = etree.XML(xslt_qxg_remove_query)
+	# only needed for verification, so it is not imported when generating without it
+	import urllib.error
 
 	try:
 		# if lxml is available: verify the xsd against the W3C scheme (excluding the qsg-stuff)
-		xsd_schema_req = urllib.request.urlopen("https://www.w3.org/2009/XMLSchema/XMLSchema.xsd")
-		xmlschema_doc = etree.parse(xsd_schema_req)
-		xmlschema = etree.XMLSchema(xmlschema_doc)
-		transform = etree.XSLT(xslt_clear)
-		xmlschema.assertValid(transform(etree.parse(xsd_path)))
+		xsd_parser, xmlschema = _get_validator()
 	except urllib.error.URLError as rexc:
 		if required:
 			raise
 		else:
 			print("Skipping XSD validation because of network error:", rexc, file=sys.stderr)
+			return
+	except (etree.XMLSyntaxError, etree.XMLSchemaParseError) as pexc:
+		if required:
+			raise
+		else:
+			print("Skipping XSD validation because the W3C XSD scheme could not be loaded:", pexc, file=sys.stderr)
+			return
+
+	if xsd_data is None:
+		xsd_tree = etree.parse(xsd_path, xsd_parser)
+	else:
+		xsd_tree = etree.parse(BytesIO(xsd_data), xsd_parser, base_url=xsd_path)
+	_strip_qxg(xsd_tree)
+	xmlschema.assertValid(xsd_tree)
+
+
+# namespace replaced tag names, interned so ns_replace results can be compared by identity
+_T_SEQUENCE = sys.intern("xs:sequence")
+_T_CHOICE = sys.intern("xs:choice")
+_T_ALL = sys.intern("xs:all")
+_T_ELEMENT = sys.intern("xs:element")
+_T_GROUP = sys.intern("xs:group")
+_T_COMPLEXTYPE = sys.intern("xs:complexType")
+_T_ATTRIBUTEGROUP = sys.intern("xs:attributeGroup")
+_T_SIMPLETYPE = sys.intern("xs:simpleType")
+_T_QXG_METHOD = sys.intern("qxg:method")
+_T_QXG_CONFIG = sys.intern("qxg:config")
+
+
+def _cached(method):
+	# caches the result of an argument-less method on the instance - only use it for values that do not change once parsing is done
+	cache_key = "_" + method.__name__
+
+	@functools.wraps(method)
+	def wrapper(self):
+		try:
+			return self.__dict__[cache_key]
+		except KeyError:
+			result = self.__dict__[cache_key] = method(self)
+			return result
+	return wrapper
+
+
+def _write_file(path: str, data: bytes, keep_unchanged: bool = True):
+	# keep unchanged files untouched, so build systems do not recompile everything that includes them
+	try:
+		if keep_unchanged and os.path.getsize(path) == len(data):
+			with open(path, "rb") as old_file:
+				if old_file.read() == data:
+					return
+	except OSError:
+		pass
+
+	# write to a temporary file first, so a failed run never leaves a truncated file behind
+	# (per process, as several generator runs may write the same file at once)
+	tmp_path = "{}.{}.tmp".format(path, os.getpid())
+	try:
+		with open(tmp_path, "wb") as tmp_file:
+			tmp_file.write(data)
+		os.replace(tmp_path, path)
+	except BaseException:
+		try:
+			os.remove(tmp_path)
+		except OSError:
+			pass
+		raise
+
+
+def _to_bool(value: str) -> bool:
+	return value == "true" or value.lower() == "true"
+
+
+def _emit(parts: list, out: TextIOBase):
+	out.write("".join(parts))
 
 
 class QxgConfig:
@@ -84,7 +593,7 @@ class QxgConfig:
 	def __init__(self, xsd_path = None):
 		self.includes = []
 		if xsd_path is not None:
-			self.className = os.path.splitext(os.path.basename(xsd_path))[0].title()
+			self.className = sys.intern(os.path.splitext(os.path.basename(xsd_path))[0].title())
 
 	def __repr__(self):
 		return "QxgConfig{className='" + self.className + \
@@ -97,9 +606,16 @@ class QxgConfig:
 
 class QxgMethod:
 	class Param:
-		name: str = ""
-		type_key: str = ""
-		default: str = ""
+		__slots__ = ("name", "type_key", "default")
+
+		name: str
+		type_key: str
+		default: str
+
+		def __init__(self, name: str = "", type_key: str = "", default: str = ""):
+			self.name = name
+			self.type_key = type_key
+			self.default = default
 
 		def __repr__(self):
 			return "{}: {} = {}".format(self.name, self.type_key, self.default)
@@ -121,24 +637,24 @@ class BasicTypeDef:
 	xmlType: str = ""
 	cppType: str = ""
 
-	def write_typedef(self, hdr: TextIOBase):
-		hdr.write("\tusing {} = {};\n\n".format(self.name, self.cppType))
+	def write_typedef(self, hdr: list):
+		hdr.append("\tusing {} = {};\n\n".format(self.name, self.cppType))
 
-	def write_converter(self, hdr: TextIOBase):
+	def write_converter(self, hdr: list):
 		pass  # nothing needs to be written here
 
 
 class ListBasicDef(BasicTypeDef):
-	def write_typedef(self, hdr: TextIOBase):
-		hdr.write("\tusing {} = QList<{}>;\n\n".format(self.name, self.cppType))
+	def write_typedef(self, hdr: list):
+		hdr.append("\tusing {} = QList<{}>;\n\n".format(self.name, self.cppType))
 
-	def write_converter(self, src: TextIOBase):
-		src.write("\tauto dataList = data.split(XML_CODE_GEN_REGEXP{QStringLiteral(\"\\\\s+\")}, QString::SkipEmptyParts);\n")
-		src.write("\t{} resList;\n".format(self.name))
-		src.write("\tresList.reserve(dataList.size());\n")
-		src.write("\tfor(const auto &elem : dataList)\n")
-		src.write("\t\tresList.append(convertData<{}>(reader, elem));\n".format(self.cppType))
-		src.write("\treturn resList;\n")
+	def write_converter(self, src: list):
+		src.append("\tauto dataList = data.split(XML_CODE_GEN_REGEXP{QStringLiteral(\"\\\\s+\")}, QString::SkipEmptyParts);\n")
+		src.append("\t{} resList;\n".format(self.name))
+		src.append("\tresList.reserve(dataList.size());\n")
+		src.append("\tfor(const auto &elem : dataList)\n")
+		src.append("\t\tresList.append(convertData<{}>(reader, elem));\n".format(self.cppType))
+		src.append("\treturn resList;\n")
 
 
 class UnionBasicDef(BasicTypeDef):
@@ -149,28 +665,30 @@ class UnionBasicDef(BasicTypeDef):
 		self.xmlTypeList = []
 		self.cppTypeList = []
 
-	def write_typedef(self, hdr: TextIOBase):
-		hdr.write("\tusing {} = std::tuple<{}>;\n\n".format(self.name, ", ".join(self.cppTypeList)))
+	def write_typedef(self, hdr: list):
+		hdr.append("\tusing {} = std::tuple<{}>;\n\n".format(self.name, ", ".join(self.cppTypeList)))
 
-	def write_converter(self, src: TextIOBase):
-		src.write("\tauto dataList = data.split(XML_CODE_GEN_REGEXP{QStringLiteral(\"\\\\s+\")}, QString::SkipEmptyParts);\n")
-		src.write("\tif(dataList.size() != {})\n".format(len(self.cppTypeList)))
-		src.write("\t\tthrowSizeError(reader, {}, dataList.size(), true);\n".format(len(self.cppTypeList)))
-		src.write("\treturn std::make_tuple(\n")
-		elem_index = 0
-		for cppType in self.cppTypeList:
-			if elem_index != 0:
-				src.write(",\n")
-			src.write("\t\tconvertData<{}>(reader, dataList[{}])".format(cppType, elem_index))
-			elem_index += 1
-		src.write("\n\t);\n")
+	def write_converter(self, src: list):
+		src.append("\tauto dataList = data.split(XML_CODE_GEN_REGEXP{QStringLiteral(\"\\\\s+\")}, QString::SkipEmptyParts);\n")
+		src.append("\tif(dataList.size() != {})\n".format(len(self.cppTypeList)))
+		src.append("\t\tthrowSizeError(reader, {}, dataList.size(), true);\n".format(len(self.cppTypeList)))
+		src.append("\treturn std::make_tuple(\n")
+		src.append(",\n".join("\t\tconvertData<{}>(reader, dataList[{}])".format(cppType, elem_index) for elem_index, cppType in enumerate(self.cppTypeList)))
+		src.append("\n\t);\n")
 
 
 class EnumBasicDef(BasicTypeDef):
 	class EnumElement:
-		xmlValue: str = ""
-		key: str = ""
-		value: str = ""
+		__slots__ = ("xmlValue", "key", "value")
+
+		xmlValue: str
+		key: str
+		value: str
+
+		def __init__(self, xml_value: str = "", key: str = "", value: str = ""):
+			self.xmlValue = xml_value
+			self.key = key
+			self.value = value
 
 	baseType: str = ""
 	elements: list
@@ -178,30 +696,29 @@ class EnumBasicDef(BasicTypeDef):
 	def __init__(self):
 		self.elements = []
 
-	def write_typedef(self, hdr: TextIOBase):
-		hdr.write("\tenum {} ".format(self.name))
+	def write_typedef(self, hdr: list):
+		hdr.append("\tenum {} ".format(self.name))
 		if self.baseType != "":
-			hdr.write(": {} ".format(self.baseType))
-		hdr.write("{\n")
+			hdr.append(": {} ".format(self.baseType))
+		hdr.append("{\n")
 		for elem in self.elements:
-			hdr.write("\t\t" + elem.key)
+			hdr.append("\t\t" + elem.key)
 			if elem.value != "":
-				hdr.write(" = " + elem.value)
-			hdr.write(",\n")
-		hdr.write("\t};\n\n")
+				hdr.append(" = " + elem.value)
+			hdr.append(",\n")
+		hdr.append("\t};\n\n")
 
-	def write_converter(self, src: TextIOBase):
-		is_first = True
+	def write_converter(self, src: list):
+		value_map = {}
 		for elem in self.elements:
-			src.write("\t")
-			if is_first:
-				is_first = False
-			else:
-				src.write("else ")
-			src.write("if(data == QStringLiteral(\"{}\"))\n".format(elem.xmlValue))
-			src.write("\t\treturn {};\n".format(elem.key))
-		src.write("\telse\n")
-		src.write("\t\tthrowInvalidEnum(reader, data);\n")
+			value_map.setdefault(elem.xmlValue, elem.key)  # first match wins, as with an if/else chain
+		src.append("\tstatic const QHash<QStringView, {}> _values {{\n".format(self.name))
+		src.append(",\n".join("\t\t{{QStringView{{u\"{}\"}}, {}}}".format(xml_value, key) for xml_value, key in value_map.items()))
+		src.append("\n\t};\n")
+		src.append("\tconst auto it = _values.constFind(QStringView{data});\n")
+		src.append("\tif(it == _values.constEnd())\n")
+		src.append("\t\tthrowInvalidEnum(reader, data);\n")
+		src.append("\treturn *it;\n")
 
 
 class ContentDef:
@@ -229,35 +746,41 @@ class ContentDef:
 	def xml_name(self) -> str:
 		raise NotImplementedError()
 
-	def write_hdr_content(self, hdr: TextIOBase):
+	def write_hdr_content(self, hdr: list):
 		try:
 			if not self.is_inherited():
-				hdr.write("\t\t{} {};\n".format(self.generate_type(), self.member_name()))
+				hdr.append("\t\t{} {};\n".format(self.generate_type(), self.member_name()))
 		except NotImplementedError:
 			pass
 
-	def write_src_content(self, src: TextIOBase, need_newline: bool, intendent: int, target_member: str = "", return_target: str = "") -> bool:
+	def write_src_content(self, src: list, need_newline: bool, intendent: int, target_member: str = "", return_target: str = "") -> bool:
 		return need_newline
 
-	def twrite(self, out: TextIOBase, intendent: int, text: str):
-		out.write("\t" * intendent)
-		out.write(text)
+	@staticmethod
+	def twrite(out: list, intendent: int, text: str):
+		out.append("\t" * intendent)
+		out.append(text)
 
-	def write_return(self, out: TextIOBase, intendent: int, return_target: str, ok: bool):
+	@staticmethod
+	def write_return(out: list, intendent: int, return_target: str, ok: bool):
 		if return_target == "":
 			if not ok:
-				self.twrite(out, intendent, "throwChild(reader);\n")
+				ContentDef.twrite(out, intendent, "throwChild(reader);\n")
 		else:
-			self.twrite(out, intendent, "{} = {};\n".format(return_target, "true" if ok else "false"))
+			ContentDef.twrite(out, intendent, "{} = {};\n".format(return_target, "true" if ok else "false"))
 
 
 class TypeContentDef(ContentDef):
 	class MethodInfo:
-		method: str = ""
-		type_key: str = ""
+		__slots__ = ("method", "type_key", "params")
+
+		method: str
+		type_key: str
 		params: list
 
-		def __init__(self):
+		def __init__(self, method: str = "", type_key: str = ""):
+			self.method = method
+			self.type_key = type_key
 			self.params = []
 
 	is_group: bool = False
@@ -281,12 +804,14 @@ class TypeContentDef(ContentDef):
 	def is_group_type(self) -> bool:
 		return self.is_group
 
+	@_cached
 	def generate_type(self) -> str:
 		if self.method is None:
 			return self.type_key
 		else:
 			return self.method.type_key
 
+	@_cached
 	def read_method(self) -> str:
 		if self.method is not None:
 			return self.method.method
@@ -295,6 +820,7 @@ class TypeContentDef(ContentDef):
 		else:
 			return super(TypeContentDef, self).read_method()
 
+	@_cached
 	def read_method_params(self) -> str:
 		if self.method is None:
 			return super(TypeContentDef, self).read_method_params()
@@ -309,9 +835,9 @@ class TypeContentDef(ContentDef):
 	def xml_name(self) -> str:
 		return self.name
 
-	def write_src_content(self, src: TextIOBase, need_newline: bool, intendent: int, target_member: str = "", return_target: str = "") -> bool:
+	def write_src_content(self, src: list, need_newline: bool, intendent: int, target_member: str = "", return_target: str = "") -> bool:
 		if need_newline:
-			src.write("\n")
+			src.append("\n")
 
 		if target_member == "":
 			target_member = "data." + self.member
@@ -333,9 +859,16 @@ class TypeContentDef(ContentDef):
 
 class SequenceContentDef(ContentDef):
 	class Element:
-		min: int = 1
-		max: int = 1
-		element: ContentDef = None
+		__slots__ = ("min", "max", "element")
+
+		min: int
+		max: int
+		element: ContentDef
+
+		def __init__(self, element: ContentDef = None, min_occurs: int = 1, max_occurs: int = 1):
+			self.element = element
+			self.min = min_occurs
+			self.max = max_occurs
 
 		def is_single(self) -> bool:
 			return self.min == 1 and self.max == 1
@@ -360,7 +893,7 @@ class SequenceContentDef(ContentDef):
 			inh += elem.element.inherits()
 		return inh
 
-	def write_hdr_content(self, hdr: TextIOBase):
+	def write_hdr_content(self, hdr: list):
 		for elem in self.elements:
 			if elem.element.is_inherited():
 				continue
@@ -368,22 +901,22 @@ class SequenceContentDef(ContentDef):
 			if elem.is_single():
 				elem.element.write_hdr_content(hdr)
 			elif elem.is_optional():
-				hdr.write("\t\toptional<{}> {};\n".format(elem.element.generate_type(), elem.element.member_name()))
+				hdr.append("\t\toptional<{}> {};\n".format(elem.element.generate_type(), elem.element.member_name()))
 			elif isinstance(elem.element, ChoiceContentDef) and elem.element.unordered:
 				elem.element.write_hdr_content(hdr)
 			else:
-				hdr.write("\t\tQList<{}> {};\n".format(elem.element.generate_type(), elem.element.member_name()))
+				hdr.append("\t\tQList<{}> {};\n".format(elem.element.generate_type(), elem.element.member_name()))
 
-	def write_src_content(self, src: TextIOBase, need_newline: bool, intendent: int, target_member: str = "", return_target: str = "") -> bool:
+	def write_src_content(self, src: list, need_newline: bool, intendent: int, target_member: str = "", return_target: str = "") -> bool:
 		if len(self.elements) == 0:
 			return need_newline
 		if need_newline:
-			src.write("\n")
+			src.append("\n")
 
 		self.twrite(src, intendent, "auto _ok = false;\n")
 
 		for elem in self.elements:
-			src.write("\n")
+			src.append("\n")
 			if (elem.element.is_group_type() and elem.is_single()) or isinstance(elem.element, AllContentDef):
 				elem.element.write_src_content(src, False, intendent,  return_target="_ok")
 			elif elem.element.is_group_type():
@@ -426,8 +959,8 @@ class SequenceContentDef(ContentDef):
 					self.twrite(src, intendent, "data.{}.reserve({});\n".format(elem.element.member_name(), elem.max))
 				self.twrite(src, intendent, "while(hasNext")
 				if elem.max != -1:
-					src.write(" && data.{}.size() < {}".format(elem.element.member_name(), elem.max))
-				src.write(") {\n")
+					src.append(" && data.{}.size() < {}".format(elem.element.member_name(), elem.max))
+				src.append(") {\n")
 				self.twrite(src, intendent + 1, "{} _element;\n".format(elem.element.generate_type()))
 				elem.element.write_src_content(src, False, intendent + 1, target_member="_element", return_target="_ok")
 				self.twrite(src, intendent + 1, "if(!_ok)\n")
@@ -453,43 +986,45 @@ class ChoiceContentDef(ContentDef):
 	def __repr__(self):
 		return "[" + " | ".join(map(str, self.choices)) + "]" if self.unordered else self.member + "<" + " | ".join(map(str, self.choices)) + ">"
 
+	@_cached
 	def generate_type(self) -> str:
 		return "variant<{}>".format(", ".join(map(lambda c: c.generate_type(), self.choices)))
 
 	def member_name(self) -> str:
 		return self.member
 
-	def write_hdr_content(self, hdr: TextIOBase):
+	def write_hdr_content(self, hdr: list):
 		if self.unordered:
 			for choice in self.choices:
-				hdr.write("\t\tQList<{}> {};\n".format(choice.generate_type(), choice.member))
+				hdr.append("\t\tQList<{}> {};\n".format(choice.generate_type(), choice.member))
 		else:
 			super(ChoiceContentDef, self).write_hdr_content(hdr)
 
-	def write_src_content(self, src: TextIOBase, need_newline: bool, intendent: int, target_member: str = "", return_target: str = "") -> bool:
+	def write_src_choice_map(self, src: list, intendent: int):
+		tag_map = {}
+		for index, choice in enumerate(self.choices):
+			tag_map.setdefault(choice.name, index)  # first match wins, as with an if/else chain
+		self.twrite(src, intendent, "static const QHash<QStringView, int> _choices {\n")
+		src.append(",\n".join("\t" * (intendent + 1) + "{{QStringView{{u\"{}\"}}, {}}}".format(tag, index) for tag, index in tag_map.items()))
+		src.append("\n")
+		self.twrite(src, intendent, "};\n")
+
+	def write_src_content(self, src: list, need_newline: bool, intendent: int, target_member: str = "", return_target: str = "") -> bool:
 		if len(self.choices) == 0:
 			return need_newline
 		if need_newline:
-			src.write("\n")
+			src.append("\n")
 
-		is_first = True
 		if self.unordered:
+			self.write_src_choice_map(src, intendent)
 			self.twrite(src, intendent, "while(hasNext && (_max == -1 || _total < _max)) {\n")
-
-			for choice in self.choices:
-				if is_first:
-					is_first = False
-					self.twrite(src, intendent + 1, "if")
-				else:
-					self.twrite(src, intendent + 1, "} else if")
-				src.write("(reader.name() == QStringLiteral(\"{}\")) {{\n".format(choice.name))
-				self.twrite(src, intendent + 2, "{} _element;\n".format(choice.generate_type()))
-				self.twrite(src, intendent + 2, "{}(reader, _element{});\n".format(choice.read_method(), choice.read_method_params()))
-				self.write_return(src, intendent + 2, return_target, True)
-				self.twrite(src, intendent + 2, "data.{}.append(std::move(_element));\n".format(choice.member_name()))
-
-			self.twrite(src, intendent + 1, "} else\n")
+			self.twrite(src, intendent + 1, "const auto _index = _choices.value(reader.name(), -1);\n")
+			self.twrite(src, intendent + 1, "if(_index == -1)\n")
 			self.twrite(src, intendent + 2, "break;\n")
+			self.twrite(src, intendent + 1, "switch(_index) {\n")
+			for index, choice in enumerate(self.choices):
+				src.append(_render_choice_case(index, choice.generate_type(), choice.read_method(), choice.read_method_params(), "", choice.member_name(), return_target, intendent + 1))
+			self.twrite(src, intendent + 1, "}\n")
 			self.twrite(src, intendent + 1, "++_total;\n")
 			self.twrite(src, intendent + 1, "hasNext = reader.readNextStartElement();\n")
 			self.twrite(src, intendent + 1, "checkError(reader);\n")
@@ -497,26 +1032,51 @@ class ChoiceContentDef(ContentDef):
 		else:
 			if target_member == "":
 				target_member = "data." + self.member
-			for choice in self.choices:
-				if is_first:
-					is_first = False
-					self.twrite(src, intendent, "if")
-				else:
-					self.twrite(src, intendent, "} else if")
-				src.write("(reader.name() == QStringLiteral(\"{}\")) {{\n".format(choice.name))
-				self.twrite(src, intendent + 1, "{} = {}{{}};\n".format(target_member, choice.generate_type()))
-				self.twrite(src, intendent + 1, "{}(reader, get<{}>({}){});\n".format(choice.read_method(), choice.generate_type(), target_member, choice.read_method_params()))
-				self.write_return(src, intendent + 1, return_target, True)
-			self.twrite(src, intendent, "} else\n")
-			self.write_return(src, intendent + 1, return_target, False)
+			self.twrite(src, intendent, "{\n")
+			self.write_src_choice_map(src, intendent + 1)
+			self.twrite(src, intendent + 1, "switch(_choices.value(reader.name(), -1)) {\n")
+			for index, choice in enumerate(self.choices):
+				src.append(_render_choice_case(index, choice.generate_type(), choice.read_method(), choice.read_method_params(), target_member, "", return_target, intendent + 1))
+			self.twrite(src, intendent + 1, "default:\n")
+			self.write_return(src, intendent + 2, return_target, False)
+			self.twrite(src, intendent + 2, "break;\n")
+			self.twrite(src, intendent + 1, "}\n")
+			self.twrite(src, intendent, "}\n")
 
 		return True
 
 
+@functools.lru_cache(maxsize=None)
+def _render_choice_case(index: int, generate_type: str, read_method: str, read_method_params: str, target_member: str, append_member: str, return_target: str, intendent: int) -> str:
+	# renders one case of a choice switch. Either assigns the variant target_member or appends to the list append_member
+	out = []
+	if target_member != "":
+		ContentDef.twrite(out, intendent, "case {}:\n".format(index))
+		ContentDef.twrite(out, intendent + 1, "{} = {}{{}};\n".format(target_member, generate_type))
+		ContentDef.twrite(out, intendent + 1, "{}(reader, get<{}>({}){});\n".format(read_method, generate_type, target_member, read_method_params))
+		ContentDef.write_return(out, intendent + 1, return_target, True)
+		ContentDef.twrite(out, intendent + 1, "break;\n")
+	else:
+		ContentDef.twrite(out, intendent, "case {}: {{\n".format(index))
+		ContentDef.twrite(out, intendent + 1, "{} _element;\n".format(generate_type))
+		ContentDef.twrite(out, intendent + 1, "{}(reader, _element{});\n".format(read_method, read_method_params))
+		ContentDef.write_return(out, intendent + 1, return_target, True)
+		ContentDef.twrite(out, intendent + 1, "data.{}.append(std::move(_element));\n".format(append_member))
+		ContentDef.twrite(out, intendent + 1, "break;\n")
+		ContentDef.twrite(out, intendent, "}\n")
+	return "".join(out)
+
+
 class AllContentDef(ContentDef):
 	class Element:
-		optional: bool = False
-		element: ContentDef = None
+		__slots__ = ("optional", "element")
+
+		optional: bool
+		element: ContentDef
+
+		def __init__(self, element: ContentDef = None, optional: bool = False):
+			self.element = element
+			self.optional = optional
 
 		def __repr__(self):
 			return "[{}]".format(str(self.element)) if self.optional else str(self.element)
@@ -529,18 +1089,18 @@ class AllContentDef(ContentDef):
 	def __repr__(self):
 		return "(" + ", ".join(map(str, self.elements)) + ")"
 
-	def write_hdr_content(self, hdr: TextIOBase):
+	def write_hdr_content(self, hdr: list):
 		for elem in self.elements:
 			if elem.optional:
-				hdr.write("\t\toptional<{}> {};\n".format(elem.element.generate_type(), elem.element.member_name()))
+				hdr.append("\t\toptional<{}> {};\n".format(elem.element.generate_type(), elem.element.member_name()))
 			else:
 				elem.element.write_hdr_content(hdr)
 
-	def write_src_content(self, src: TextIOBase, need_newline: bool, intendent: int, target_member: str = "", return_target: str = "") -> bool:
+	def write_src_content(self, src: list, need_newline: bool, intendent: int, target_member: str = "", return_target: str = "") -> bool:
 		if len(self.elements) == 0:
 			return need_newline
 		if need_newline:
-			src.write("\n")
+			src.append("\n")
 
 		self.twrite(src, intendent, "{\n")
 		self.twrite(src, intendent + 1, "QSet<int> _usedElements;\n")
@@ -549,7 +1109,7 @@ class AllContentDef(ContentDef):
 		cnt = 0
 		req_list = []
 		for elem in self.elements:
-			src.write("\n")
+			src.append("\n")
 			if elem.optional:
 				self.twrite(src, intendent + 2, "{} _element_{};\n".format(elem.element.generate_type(), cnt))
 				self.twrite(src, intendent + 2, "if(reader.name() == QStringLiteral(\"{}\")) {{\n".format(elem.element.xml_name()))
@@ -575,7 +1135,7 @@ class AllContentDef(ContentDef):
 				req_list.append(cnt)
 			cnt += 1
 
-		src.write("\n")
+		src.append("\n")
 		self.twrite(src, intendent + 2, "break;\n")
 		self.twrite(src, intendent + 1, "}\n")
 		self.twrite(src, intendent + 1, "if(!_usedElements.contains(QSet<int> {{{}}}))\n".format(", ".join(map(str, req_list))))
@@ -600,8 +1160,33 @@ class MemberDef:
 			"} = " + str(self.default) + \
 			(" (required)" if self.required else " (optional)")
 
+	@_cached
+	def declaration(self) -> str:
+		if not self.required and self.default is None:
+			return "\t\toptional<{}> {};\n".format(self.cppType, self.member)
+		else:
+			return "\t\t{} {};\n".format(self.cppType, self.member)
+
+	@_cached
+	def read_statement(self) -> str:
+		if self.required:
+			return "\tdata.{} = readRequiredAttrib<{}>(reader, QStringLiteral(\"{}\"));\n".format(self.member, self.cppType, self.name)
+		elif self.default is None:
+			return "\tdata.{} = readOptionalAttrib<{}>(reader, QStringLiteral(\"{}\"));\n".format(self.member, self.cppType, self.name)
+		else:
+			return "\tdata.{} = readOptionalAttrib<{}>(reader, QStringLiteral(\"{}\"), QStringLiteral(\"{}\"));\n".format(self.member, self.cppType, self.name, self.default)
+
+
+class TypeKind(Enum):
+	Simple = "simple"
+	Complex = "complex"
+	Mixed = "mixed"
+	Group = "group"
+	AttrGroup = "attrGroup"
+
 
 class TypeDef:
+	kind: TypeKind = None
 	name: str = ""
 	members: list
 	member_groups: list
@@ -617,14 +1202,21 @@ class TypeDef:
 	def inherits(self) -> list:
 		return list(map(lambda m: m.type_key, filter(lambda m: m.inherit, self.member_groups)))
 
-	def write_hdr_content(self, hdr: TextIOBase):
+	def write_hdr_method_signature(self, hdr: list):
+		hdr.append("\tvirtual void read_{}(QXmlStreamReader &reader, {} &data);\n".format(self.name, self.name))
+
+	def write_src_method_signature(self, src: list, class_name: str):
+		src.append("void {}::read_{}(QXmlStreamReader &reader, {} &data)\n".format(class_name, self.name, self.name))
+
+	def write_hdr_content(self, hdr: list):
 		pass
 
-	def write_src_content(self, src: TextIOBase, need_newline: bool):
+	def write_src_content(self, src: list, need_newline: bool):
 		pass
 
 
 class SimpleTypeDef(TypeDef):
+	kind: TypeKind = TypeKind.Simple
 	contentMember: str = ""
 	contentXmlType: str = ""
 	contentCppType: str = ""
@@ -638,21 +1230,22 @@ class SimpleTypeDef(TypeDef):
 	def inherits(self) -> list:
 		return ([self.contentCppType] if self.hasCppBase else []) + super(SimpleTypeDef, self).inherits()
 
-	def write_hdr_content(self, hdr: TextIOBase):
+	def write_hdr_content(self, hdr: list):
 		if not self.hasCppBase:
-			hdr.write("\t\t{} {};\n".format(self.contentCppType, self.contentMember))
+			hdr.append("\t\t{} {};\n".format(self.contentCppType, self.contentMember))
 
-	def write_src_content(self, src: TextIOBase, need_newline: bool):
+	def write_src_content(self, src: list, need_newline: bool):
 		if need_newline:
-			src.write("\n")
+			src.append("\n")
 
 		if self.hasCppBase:
-			src.write("\tread_{}(reader, data);\n".format(self.contentCppType))
+			src.append("\tread_{}(reader, data);\n".format(self.contentCppType))
 		else:
-			src.write("\treadContent<{}>(reader, data.{});\n".format(self.contentCppType, self.contentMember))
+			src.append("\treadContent<{}>(reader, data.{});\n".format(self.contentCppType, self.contentMember))
 
 
 class ComplexTypeDef(TypeDef):
+	kind: TypeKind = TypeKind.Complex
 	baseType: str = ""
 	content: SequenceContentDef = None
 
@@ -668,34 +1261,41 @@ class ComplexTypeDef(TypeDef):
 		inh += super(ComplexTypeDef, self).inherits()
 		return inh
 
-	def write_hdr_content(self, hdr: TextIOBase):
+	def write_hdr_method_signature(self, hdr: list):
+		hdr.append("\tvirtual void read_{}(QXmlStreamReader &reader, {} &data, bool keepElementOpen = false);\n".format(self.name, self.name))
+
+	def write_src_method_signature(self, src: list, class_name: str):
+		src.append("void {}::read_{}(QXmlStreamReader &reader, {} &data, bool keepElementOpen)\n".format(class_name, self.name, self.name))
+
+	def write_hdr_content(self, hdr: list):
 		if self.content is not None:
 			self.content.write_hdr_content(hdr)
 
-	def write_src_content(self, src: TextIOBase, need_newline: bool):
+	def write_src_content(self, src: list, need_newline: bool):
 		# write base class
 		if self.baseType != "":
 			if need_newline:
-				src.write("\n")
+				src.append("\n")
 			need_newline = True
-			src.write("\tread_{}(reader, data, true);\n".format(self.baseType))
+			src.append("\tread_{}(reader, data, true);\n".format(self.baseType))
 
 		# write content
 		if need_newline:
-			src.write("\n")
+			src.append("\n")
 		if self.baseType != "":
-			src.write("\tauto hasNext = reader.isStartElement();\n")
+			src.append("\tauto hasNext = reader.isStartElement();\n")
 		else:
-			src.write("\tauto hasNext = reader.readNextStartElement();\n")
+			src.append("\tauto hasNext = reader.readNextStartElement();\n")
 		if self.content is not None:
 			need_newline = self.content.write_src_content(src, False, 1)
 			if need_newline:
-				src.write("\n")
-		src.write("\tif(hasNext && !keepElementOpen)\n")
-		src.write("\t\tthrowChild(reader);\n")
+				src.append("\n")
+		src.append("\tif(hasNext && !keepElementOpen)\n")
+		src.append("\t\tthrowChild(reader);\n")
 
 
 class MixedTypeDef(ComplexTypeDef):
+	kind: TypeKind = TypeKind.Mixed
 	contentMember: str = ""
 	contentCppType: str = ""
 
@@ -705,49 +1305,50 @@ class MixedTypeDef(ComplexTypeDef):
 			"} -> " + str(self.members + self.member_groups) + \
 			" {\n" + str(self.content) + "\n}"
 
-	def write_hdr_content(self, hdr: TextIOBase):
+	def write_hdr_content(self, hdr: list):
 		super(MixedTypeDef, self).write_hdr_content(hdr)
-		hdr.write("\t\toptional<{}> {};\n".format(self.contentCppType, self.contentMember))
+		hdr.append("\t\toptional<{}> {};\n".format(self.contentCppType, self.contentMember))
 
-	def write_src_content(self, src: TextIOBase, need_newline: bool):
+	def write_src_content(self, src: list, need_newline: bool):
 		# read simple content
-		src.write("\tQString contentText;\n")
-		src.write("\tauto canReadText = true;\n")
-		src.write("\twhile(canReadText) {\n")
-		src.write("\t\tswitch(reader.readNext()) {\n")
-		src.write("\t\tcase QXmlStreamReader::Characters:\n")
-		src.write("\t\tcase QXmlStreamReader::EntityReference:\n")
-		src.write("\t\t\tcontentText.append(reader.text());\n")
-		src.write("\t\t\tbreak;\n")
-		src.write("\t\tcase QXmlStreamReader::StartElement:\n")
-		src.write("\t\tcase QXmlStreamReader::EndElement:\n")
-		src.write("\t\t\tcanReadText = false;\n")
-		src.write("\t\t\tbreak;\n")
-		src.write("\t\tcase QXmlStreamReader::ProcessingInstruction:\n")
-		src.write("\t\tcase QXmlStreamReader::Comment:\n")
-		src.write("\t\t\tbreak;\n")
-		src.write("\t\tdefault:\n")
-		src.write("\t\t\tthrowChild(reader);\n")
-		src.write("\t\t}\n")
-		src.write("\t}\n\n")
+		src.append("\tQString contentText;\n")
+		src.append("\tauto canReadText = true;\n")
+		src.append("\twhile(canReadText) {\n")
+		src.append("\t\tswitch(reader.readNext()) {\n")
+		src.append("\t\tcase QXmlStreamReader::Characters:\n")
+		src.append("\t\tcase QXmlStreamReader::EntityReference:\n")
+		src.append("\t\t\tcontentText.append(reader.text());\n")
+		src.append("\t\t\tbreak;\n")
+		src.append("\t\tcase QXmlStreamReader::StartElement:\n")
+		src.append("\t\tcase QXmlStreamReader::EndElement:\n")
+		src.append("\t\t\tcanReadText = false;\n")
+		src.append("\t\t\tbreak;\n")
+		src.append("\t\tcase QXmlStreamReader::ProcessingInstruction:\n")
+		src.append("\t\tcase QXmlStreamReader::Comment:\n")
+		src.append("\t\t\tbreak;\n")
+		src.append("\t\tdefault:\n")
+		src.append("\t\t\tthrowChild(reader);\n")
+		src.append("\t\t}\n")
+		src.append("\t}\n\n")
 
 		# save simple content or...
-		src.write("\tif(reader.tokenType() == QXmlStreamReader::EndElement) {\n")
-		src.write("\t\tdata.{} = QVariant{{std::move(contentText)}}.value<{}>();\n".format(self.contentMember, self.contentCppType))
+		src.append("\tif(reader.tokenType() == QXmlStreamReader::EndElement) {\n")
+		src.append("\t\tdata.{} = QVariant{{std::move(contentText)}}.value<{}>();\n".format(self.contentMember, self.contentCppType))
 
 		# ... read complex content
-		src.write("\t} else {\n")
-		src.write("\t\tauto hasNext = true;\n")
+		src.append("\t} else {\n")
+		src.append("\t\tauto hasNext = true;\n")
 		if self.content is not None:
 			need_newline = self.content.write_src_content(src, False, 2)
 			if need_newline:
-				src.write("\n")
-		src.write("\t\tif(hasNext && !keepElementOpen)\n")
-		src.write("\t\t\tthrowChild(reader);\n")
-		src.write("\t}\n")
+				src.append("\n")
+		src.append("\t\tif(hasNext && !keepElementOpen)\n")
+		src.append("\t\t\tthrowChild(reader);\n")
+		src.append("\t}\n")
 
 
 class GroupTypeDef(TypeDef):
+	kind: TypeKind = TypeKind.Group
 	content: SequenceContentDef = None
 
 	def __repr__(self):
@@ -760,23 +1361,29 @@ class GroupTypeDef(TypeDef):
 		inh += super(GroupTypeDef, self).inherits()
 		return inh
 
-	def write_hdr_content(self, hdr: TextIOBase):
+	def write_hdr_method_signature(self, hdr: list):
+		hdr.append("\tvirtual bool read_{}(QXmlStreamReader &reader, {} &data, bool hasNext);\n".format(self.name, self.name))
+
+	def write_src_method_signature(self, src: list, class_name: str):
+		src.append("bool {}::read_{}(QXmlStreamReader &reader, {} &data, bool hasNext)\n".format(class_name, self.name, self.name))
+
+	def write_hdr_content(self, hdr: list):
 		if self.content is not None:
 			self.content.write_hdr_content(hdr)
 
-	def write_src_content(self, src: TextIOBase, need_newline: bool):
+	def write_src_content(self, src: list, need_newline: bool):
 		if self.content is not None:
 			self.content.write_src_content(src, need_newline, 1)
-		src.write("\n\treturn hasNext;\n")
+		src.append("\n\treturn hasNext;\n")
 
 
 class AttrGroupTypeDef(TypeDef):
-	pass
+	kind: TypeKind = TypeKind.AttrGroup
 
 
 class XmlCodeGenerator:
 	ns_map: dict = {
-		"qxg": "https://skycoder42.de/xml/schemas/QXmlCodeGen"
+		"qxg": sys.intern("https://skycoder42.de/xml/schemas/QXmlCodeGen")
 	}
 
 	xs_type_map: dict = {
@@ -807,116 +1414,231 @@ class XmlCodeGenerator:
 	}
 	xs_cpp_base_types: set = set()
 
+	ns_replace_map: dict = {
+		"{https://skycoder42.de/xml/schemas/QXmlCodeGen}": "qxg:",
+		"{http://www.w3.org/2001/XMLSchema}": "xs:",
+		"{https://www.w3.org/2001/XMLSchema}": "xs:",
+		"{http://www.w3.org/2009/XMLSchema/XMLSchema}": "xs:",
+		"{https://www.w3.org/2009/XMLSchema/XMLSchema}": "xs:"
+	}
+
+	xpath_queries: tuple = (
+		"qxg:include",
+		"qxg:param",
+		"xs:attribute",
+		"xs:attributeGroup",
+		"xs:simpleContent",
+		"xs:complexContent",
+		"xs:extension",
+		"xs:enumeration"
+	)
+
+	qxg_attributes: tuple = (
+		"member",
+		"method",
+		"inherit",
+		"type",
+		"key",
+		"value",
+		"declare",
+		"unordered"
+	)
+
 	config: QxgConfig
 	methods: list
+	methods_by_name: dict
+	type_defs: list
+	simple_types: list
+	root_elements: list
+	xpaths: dict
+	tag_cache: dict
+	qxg_keys: dict
+	single_content_readers: dict
+	simple_type_readers: dict
+	top_level_readers: dict
 
 	def __init__(self):
 		self.methods = []
-
-	def ns_replace(self, name: str) -> str:
-		ns_replace_map = {
-			"{https://skycoder42.de/xml/schemas/QXmlCodeGen}": "qxg:",
-			"{http://www.w3.org/2001/XMLSchema}": "xs:",
-			"{https://www.w3.org/2001/XMLSchema}": "xs:",
-			"{http://www.w3.org/2009/XMLSchema/XMLSchema}": "xs:",
-			"{https://www.w3.org/2009/XMLSchema/XMLSchema}": "xs:"
+		self.methods_by_name = {}
+		self.type_defs = []
+		self.simple_types = []
+		self.root_elements = []
+		self.xpaths = {}
+		self.tag_cache = {}
+		# attribute name -> qualified key, so qxg attributes can be looked up without rebuilding the name
+		self.qxg_keys = {attr: "{" + self.ns_map["qxg"] + "}" + attr for attr in self.qxg_attributes}
+		# tag -> (reader, allow_count) for the one content child of a xs:complexType or xs:group
+		self.single_content_readers = {
+			_T_SEQUENCE: (self.read_sequence_content, False),
+			_T_CHOICE: (self.read_choice_content, True),
+			_T_ALL: (self.read_all_content, False),
+			_T_ELEMENT: (functools.partial(self.read_type_content, allow_inherit=True), True),
+			_T_GROUP: (functools.partial(self.read_type_content, allow_inherit=True), True)
 		}
-		for key, rep in ns_replace_map.items():
-			name = name.replace(key, rep)
-		return name
+		self.simple_type_readers = {
+			"xs:list": self.read_simple_list_type,
+			"xs:union": self.read_simple_union_type,
+			"xs:restriction": self.read_simple_enum_type
+		}
+		# tag -> handler for the definitions that can appear at the top level of the schema
+		self.top_level_readers = {
+			_T_QXG_CONFIG: self.read_config,
+			_T_COMPLEXTYPE: self.add_type,
+			_T_ELEMENT: self.add_root_element,
+			_T_GROUP: self.add_group,
+			_T_ATTRIBUTEGROUP: self.add_attr_group,
+			_T_SIMPLETYPE: self.add_simple_type,
+			_T_QXG_METHOD: self.add_method
+		}
+
+	def compile_xpaths(self):
+		# the xs prefix is only known after reading the root, so the queries must be compiled afterwards
+		ns_map = dict(self.ns_map)
+		for query in self.xpath_queries:
+			if XPath is not None:
+				self.xpaths[query] = XPath(query, namespaces=ns_map)
+			else:
+				self.xpaths[query] = functools.partial(Element.findall, path=query, namespaces=ns_map)
 
-	def ns_replace_inv(self, name: str) -> str:
-		for key, rep in self.ns_map.items():
-			name = name.replace(key + ":", "{" + rep + "}")
-		return name
+	def find_all(self, node: Element, query: str) -> list:
+		return self.xpaths[query](node)
+
+	def find(self, node: Element, query: str) -> Element:
+		result = self.xpaths[query](node)
+		return result[0] if len(result) > 0 else None
+
+	def ns_replace(self, name: str) -> str:
+		tag = self.tag_cache.get(name)
+		if tag is None:
+			tag = name
+			# tags are in clark notation, so only the leading namespace part can ever be replaced
+			if name.startswith("{"):
+				ns_end = name.find("}") + 1
+				rep = self.ns_replace_map.get(name[:ns_end])
+				if rep is not None:
+					tag = rep + name[ns_end:]
+			tag = self.tag_cache[name] = sys.intern(tag)
+		return tag
+
+	def add_type(self, node: Element):
+		type_def = self.read_type(node)
+		if type_def.kind is TypeKind.Simple:
+			type_def.name = sys.intern(type_def.name)
+			self.xs_type_map[type_def.name] = type_def.name
+			self.xs_cpp_base_types.add(type_def.name)
+		self.type_defs.append(type_def)
+
+	def add_root_element(self, node: Element):
+		self.root_elements.append(self.read_type_content(node))
+
+	def add_group(self, node: Element):
+		self.type_defs.append(self.read_group(node))
+
+	def add_attr_group(self, node: Element):
+		self.type_defs.append(self.read_attr_group(node))
+
+	def add_simple_type(self, node: Element):
+		s_type = self.read_simple_type(node)
+		s_type.name = sys.intern(s_type.name)
+		self.simple_types.append(s_type)
+		self.xs_type_map[s_type.name] = s_type.name
+
+	def add_method(self, node: Element):
+		method = self.read_method(node)
+		self.methods.append(method)
+		self.methods_by_name[method.name] = method
 
 	def read_config(self, node: Element):
 		self.config = QxgConfig()
 		if "class" in node.attrib:
-			self.config.className = node.attrib["class"]
+			self.config.className = sys.intern(node.attrib["class"])
 		if "prefix" in node.attrib:
 			self.config.prefix = node.attrib["prefix"]
 		if "ns" in node.attrib:
-			self.config.ns = node.attrib["ns"]
+			self.config.ns = sys.intern(node.attrib["ns"])
 		if "stdcompat" in node.attrib:
-			self.config.stdcompat = node.attrib["stdcompat"].lower() == "true"
+			self.config.stdcompat = _to_bool(node.attrib["stdcompat"])
 		if "schemaUrl" in node.attrib:
 			self.config.schemaUrl = node.attrib["schemaUrl"]
 		if "visibility" in node.attrib:
 			self.config.visibility = QxgConfig.Visibility(node.attrib["visibility"].lower())
-		for child in node.findall("qxg:include", namespaces=self.ns_map):
+		for child in self.find_all(node, "qxg:include"):
 			include = QxgConfig.Include(child.text)
 			if "local" in child.attrib:
-				include.local = child.attrib["local"].lower() == "true"
+				include.local = _to_bool(child.attrib["local"])
 			self.config.includes.append(include)
 
 	def read_method(self, node: Element) -> QxgMethod:
 		method = QxgMethod()
 		method.name = node.attrib["name"]
 		method.type_key = node.attrib["type"]
-		method.as_group = node.attrib["asGroup"].lower() == "true" if "asGroup" in node.attrib else False
-		for child in node.findall("qxg:param", namespaces=self.ns_map):
-			param = QxgMethod.Param()
-			param.name = child.attrib["name"]
-			param.type_key = child.attrib["type"]
-			param.default = child.text
-			method.params.append(param)
+		method.as_group = _to_bool(node.get("asGroup", "false"))
+		method.params = [QxgMethod.Param(child.attrib["name"], child.attrib["type"], child.text) for child in self.find_all(node, "qxg:param")]
 		return method
 
 	def read_qxg(self, node: Element, attr: str, default: str, map_type: bool = False) -> str:
-		rep_attr = self.ns_replace_inv("qxg:" + attr)
-		if rep_attr in node.attrib:
-			return node.attrib[rep_attr]
+		value = node.get(self.qxg_keys[attr])
+		if value is not None:
+			return value
 		else:
 			return self.xs_type_map[default] if map_type else default
 
+	def read_qxg_bool(self, node: Element, attr: str, default: bool = False) -> bool:
+		value = self.read_qxg(node, attr, "")
+		return default if value == "" else _to_bool(value)
+
 	def read_occurs(self, node: Element) -> (int, int):
-		min_occurs = node.attrib["minOccurs"] if "minOccurs" in node.attrib else 1
-		max_occurs = node.attrib["maxOccurs"] if "maxOccurs" in node.attrib else 1
+		min_occurs = node.get("minOccurs", 1)
+		max_occurs = node.get("maxOccurs", 1)
 		return int(min_occurs), -1 if max_occurs == "unbounded" else int(max_occurs)
 
 	def read_sequence_content(self, node: Element) -> SequenceContentDef:
 		sequence = SequenceContentDef()
+		# local bindings keep the per-child loop free of repeated attribute lookups
+		ns_replace = self.ns_replace
+		read_occurs = self.read_occurs
+		append = sequence.elements.append
 		for child in node:
-			nstag = self.ns_replace(child.tag)
-			elem = SequenceContentDef.Element()
-			elem.min, elem.max = self.read_occurs(child)
-			if nstag == "xs:sequence":
-				if not elem.is_single():
+			nstag = ns_replace(child.tag)
+			omin, omax = read_occurs(child)
+			if nstag is _T_SEQUENCE:
+				if omin != 1 or omax != 1:
 					raise Exception("A xs:sequence with not exactly 1 occurrence within a xs:sequence is not supported. Make the inner xs:sequence a xs:group")
 				else:
 					sub_elem = self.read_sequence_content(child)
 					sequence.elements += sub_elem.elements
-			elif nstag == "xs:choice":
-				elem.element = self.read_choice_content(child, allow_unordered=True)
-			elif nstag == "xs:all":
+				continue
+			elif nstag is _T_CHOICE:
+				sub_element = self.read_choice_content(child, allow_unordered=True)
+			elif nstag is _T_ALL:
 				raise Exception("An xs:all within a xs:sequence is not supported. Make the inner xs:all a xs:group")
-			elif nstag == "xs:element" or nstag == "xs:group":
-				if nstag == "xs:group" and elem.min != elem.max:
+			elif nstag is _T_ELEMENT or nstag is _T_GROUP:
+				if nstag is _T_GROUP and omin != omax:
 					raise Exception("xs:group elements can only appear with a fixed amount within a sequence (i.e. min == max)")
-				elem.element = self.read_type_content(child, allow_inherit=elem.is_single())
+				sub_element = self.read_type_content(child, allow_inherit=omin == 1 and omax == 1)
 			else:
 				raise Exception("Unsupported element {} within a xs:sequence".format(nstag))
 
-			if elem.element:
-				sequence.elements.append(elem)
+			if sub_element:
+				append(SequenceContentDef.Element(sub_element, omin, omax))
 		return sequence
 
 	def read_choice_content(self, node: Element, allow_unordered: bool = False) -> ChoiceContentDef:
 		choice = ChoiceContentDef()
-		choice.unordered = self.read_qxg(node, "unordered", "false").lower() == "true"
+		choice.unordered = self.read_qxg_bool(node, "unordered")
 		if choice.unordered and not allow_unordered:
 			raise Exception("Found qxg:unordered in xs:choice, but that is only allowed for choices that are in a xs:sequence")
 		choice.member = self.read_qxg(node, "member", "")
 		if choice.member == "" and not choice.unordered:
 			raise Exception("A xs:choice must have an explicitly set qxg:member")
 
+		ns_replace = self.ns_replace
 		for child in node:
-			nstag = self.ns_replace(child.tag)
-			if nstag == "xs:choice":
+			nstag = ns_replace(child.tag)
+			if nstag is _T_CHOICE:
 				sub_choices = self.read_choice_content(child)
 				choice.choices += sub_choices.choices
-			elif nstag == "xs:element":
+			elif nstag is _T_ELEMENT:
 				choice.choices.append(self.read_type_content(child, allow_unnamed=not choice.unordered))
 			else:
 				raise Exception("Unsupported element {} within a xs:choice".format(nstag))
@@ -924,23 +1646,24 @@ class XmlCodeGenerator:
 
 	def read_all_content(self, node: Element) -> AllContentDef:
 		allc = AllContentDef()
+		ns_replace = self.ns_replace
+		read_occurs = self.read_occurs
+		append = allc.elements.append
 		for child in node:
-			nstag = self.ns_replace(child.tag)
-			elem = AllContentDef.Element()
-			omin, omax = self.read_occurs(child)
+			nstag = ns_replace(child.tag)
+			omin, omax = read_occurs(child)
 			if omin > 1 or omax != 1:
 				raise Exception("Invalid occurrences on element within xs:all")
-			elem.optional = omin == 0
 
-			if nstag == "xs:choice":
-				elem.element = self.read_choice_content(child)
-			elif nstag == "xs:element":
-				elem.element = self.read_type_content(child)
+			if nstag is _T_CHOICE:
+				sub_element = self.read_choice_content(child)
+			elif nstag is _T_ELEMENT:
+				sub_element = self.read_type_content(child)
 			else:
 				raise Exception("Unsupported element {} within a xs:choice".format(nstag))
 
-			if elem.element:
-				allc.elements.append(elem)
+			if sub_element:
+				append(AllContentDef.Element(sub_element, omin == 0))
 		return allc
 
 	def read_type_content(self, node: Element, allow_inherit: bool = False, allow_unnamed: bool = False) -> TypeContentDef:
@@ -950,11 +1673,11 @@ class XmlCodeGenerator:
 		inherit_mem = self.read_qxg(node, "inherit", "")
 		if inherit_mem != "":
 			if allow_inherit:
-				content.inherit = inherit_mem.lower() == "true"
+				content.inherit = _to_bool(inherit_mem)
 			else:
 				raise Exception("Found qxg:inherit on {} - but it is not allowed in the current scope".format(nstag))
 
-		if nstag == "xs:element":
+		if nstag is _T_ELEMENT:
 			content.is_group = False
 			content.name = node.attrib["name"]
 			content.member = self.read_qxg(node, "member", content.name[0].lower() + content.name[1:])
@@ -962,7 +1685,7 @@ class XmlCodeGenerator:
 			if content.type_key in self.xs_type_map:
 				content.is_basic_type = content.type_key not in self.xs_cpp_base_types
 				content.type_key = self.xs_type_map[content.type_key]
-		elif nstag == "xs:group":
+		elif nstag is _T_GROUP:
 			content.is_group = True
 			content.member = self.read_qxg(node, "member", "")
 			if content.member == "" and not content.inherit and not allow_unnamed:
@@ -975,13 +1698,12 @@ class XmlCodeGenerator:
 		if method_mem != "":
 			content.method = TypeContentDef.MethodInfo()
 			content.method.method = method_mem
-			for method in self.methods:
-				if method.name == method_mem:
-					content.method.type_key = method.type_key
+			method = self.methods_by_name.get(method_mem)
+			if method is not None:
+				content.method.type_key = method.type_key
 			if content.method.type_key == "":
 				raise Exception("qxg:method specified with a method that was not declared beforehand")
-			for child in node.findall("qxg:param", namespaces=self.ns_map):
-				content.method.params.append(child.text)
+			content.method.params = [child.text for child in self.find_all(node, "qxg:param")]
 
 		return content
 
@@ -989,38 +1711,24 @@ class XmlCodeGenerator:
 		content = None
 		sub_content = None
 		allow_count = False
-		if sub_content is None:
-			sub_content = node.find("xs:sequence", namespaces=self.ns_map)
-			if sub_content is not None:
-				content = self.read_sequence_content(sub_content)
-		if sub_content is None:
-			sub_content = node.find("xs:choice", namespaces=self.ns_map)
-			if sub_content is not None:
-				content = self.read_choice_content(sub_content)
-				allow_count = True
-		if sub_content is None:
-			sub_content = node.find("xs:all", namespaces=self.ns_map)
-			if sub_content is not None:
-				content = self.read_all_content(sub_content)
-		if sub_content is None:
-			sub_content = node.find("xs:element", namespaces=self.ns_map)
-			if sub_content is not None:
-				content = self.read_type_content(sub_content, allow_inherit=True)
-				allow_count = True
-		if sub_content is None:
-			sub_content = node.find("xs:group", namespaces=self.ns_map)
-			if sub_content is not None:
-				content = self.read_type_content(sub_content, allow_inherit=True)
-				allow_count = True
+		ns_replace = self.ns_replace
+		get_reader = self.single_content_readers.get
+		for child in node:
+			content_reader = get_reader(ns_replace(child.tag))
+			if content_reader is not None:
+				sub_content = child
+				read_content, allow_count = content_reader
+				content = read_content(sub_content)
+				break
 
 		# if applicable: apply count
 		if content is not None and not isinstance(content, SequenceContentDef):
-			elem = SequenceContentDef.Element()
+			omin, omax = 1, 1
 			if allow_count:
-				elem.min, elem.max = self.read_occurs(sub_content)
-				if (elem.min != 1 or elem.max != 1) and isinstance(content, TypeContentDef) and content.inherit:
+				omin, omax = self.read_occurs(sub_content)
+				if (omin != 1 or omax != 1) and isinstance(content, TypeContentDef) and content.inherit:
 					raise Exception("Found qxg:inherit on {} - but it is not allowed in combination with occurs".format(self.ns_replace(sub_content.tag)))
-			elem.element = content
+			elem = SequenceContentDef.Element(content, omin, omax)
 			content = SequenceContentDef()
 			content.elements.append(elem)
 
@@ -1028,24 +1736,22 @@ class XmlCodeGenerator:
 
 	def read_attribs(self, node: Element) -> (list, list):
 		members = []
-		for attrib in node.findall("xs:attribute", namespaces=self.ns_map):
+		for attrib in self.find_all(node, "xs:attribute"):
 			member = MemberDef()
 			member.xmlType = attrib.attrib["type"]
 			member.cppType = self.read_qxg(attrib, "type", member.xmlType, map_type=True)
 			member.name = attrib.attrib["name"]
 			member.member = self.read_qxg(attrib, "member", member.name)
-			member.default = attrib.attrib["default"] if "default" in attrib.attrib else None
-			member.required = (attrib.attrib["use"] if "use" in attrib.attrib else "optional").lower() == "required"
+			member.default = attrib.get("default")
+			member.required = attrib.get("use", "optional").lower() == "required"
 			members.append(member)
 
 		member_groups = []
-		for attrib in node.findall("xs:attributeGroup", namespaces=self.ns_map):
+		for attrib in self.find_all(node, "xs:attributeGroup"):
 			member = TypeContentDef()
 			member.is_group = True
 
-			inherit_mem = self.read_qxg(attrib, "inherit", "")
-			if inherit_mem != "":
-				member.inherit = inherit_mem.lower() == "true"
+			member.inherit = self.read_qxg_bool(attrib, "inherit")
 
 			member.member = self.read_qxg(attrib, "member", "")
 			if member.member == "" and not member.inherit:
@@ -1058,22 +1764,22 @@ class XmlCodeGenerator:
 	def read_type(self, node: Element) -> TypeDef:
 		content_node = None
 		type_def = None
-		mixed = node.attrib["mixed"].lower() == "true" if "mixed" in node.attrib else False
+		mixed = _to_bool(node.get("mixed", "false"))
 
 		# check for simple content
 		if content_node is None:
-			content_node = node.find("xs:simpleContent", namespaces=self.ns_map)
+			content_node = self.find(node, "xs:simpleContent")
 			if content_node is not None:
-				content_node = content_node.find("xs:extension", namespaces=self.ns_map)
+				content_node = self.find(content_node, "xs:extension")
 				if content_node is None:
 					raise Exception("Only xs:simpleContent elements with an xs:extension as child are allowed")
 				type_def = SimpleTypeDef()
 				type_def.contentXmlType = content_node.attrib["base"]
 		# check for complex content
 		if content_node is None:
-			content_node = node.find("xs:complexContent", namespaces=self.ns_map)
+			content_node = self.find(node, "xs:complexContent")
 			if content_node is not None:
-				content_node = content_node.find("xs:extension", namespaces=self.ns_map)
+				content_node = self.find(content_node, "xs:extension")
 				if content_node is None:
 					raise Exception("Only xs:complexContent elements with an xs:extension as child are allowed")
 				if mixed:
@@ -1090,18 +1796,18 @@ class XmlCodeGenerator:
 
 		# extract the name and optiona declare
 		type_def.name = node.attrib["name"]
-		type_def.declare = self.read_qxg(node, "declare", "false").lower() == "true"
+		type_def.declare = self.read_qxg_bool(node, "declare")
 		# simple or mixed: content type
-		if isinstance(type_def, SimpleTypeDef) or isinstance(type_def, MixedTypeDef):
-			base_type = type_def.contentXmlType if isinstance(type_def, SimpleTypeDef) else "xs:string"
+		if type_def.kind is TypeKind.Simple or type_def.kind is TypeKind.Mixed:
+			base_type = type_def.contentXmlType if type_def.kind is TypeKind.Simple else "xs:string"
 			type_def.contentCppType = self.read_qxg(content_node, "type", base_type, map_type=True)
 			type_def.contentMember = self.read_qxg(content_node, "member", (type_def.name[0].lower() + type_def.name[1:]))
-			if isinstance(type_def, SimpleTypeDef) and type_def.contentCppType in self.xs_cpp_base_types:
+			if type_def.kind is TypeKind.Simple and type_def.contentCppType in self.xs_cpp_base_types:
 				type_def.hasCppBase = True
 		# extract all attributes
 		type_def.members, type_def.member_groups = self.read_attribs(content_node)
 		# complex: content elements
-		if isinstance(type_def, ComplexTypeDef):
+		if type_def.kind is TypeKind.Complex or type_def.kind is TypeKind.Mixed:
 			type_def.content = self.read_single_content(content_node)
 
 		return type_def
@@ -1133,7 +1839,7 @@ class XmlCodeGenerator:
 
 	def read_simple_enum_type(self, node: Element) -> EnumBasicDef:
 		type_def = None
-		for elem in node.findall("xs:enumeration", namespaces=self.ns_map):
+		for elem in self.find_all(node, "xs:enumeration"):
 			if type_def is None:
 				type_def = EnumBasicDef()
 			element = EnumBasicDef.EnumElement()
@@ -1151,18 +1857,11 @@ class XmlCodeGenerator:
 
 	def read_simple_type(self, node: Element) -> BasicTypeDef:
 		basic_def = None
-		if basic_def is None:
-			content_node = node.find("xs:list", namespaces=self.ns_map)
-			if content_node is not None:
-				basic_def = self.read_simple_list_type(content_node)
-		if basic_def is None:
-			content_node = node.find("xs:union", namespaces=self.ns_map)
-			if content_node is not None:
-				basic_def = self.read_simple_union_type(content_node)
-		if basic_def is None:
-			content_node = node.find("xs:restriction", namespaces=self.ns_map)
-			if content_node is not None:
-				basic_def = self.read_simple_enum_type(content_node)
+		for child in node:
+			type_reader = self.simple_type_readers.get(self.ns_replace(child.tag))
+			if type_reader is not None:
+				basic_def = type_reader(child)
+				break
 		if basic_def is None:
 			raise Exception("Unable to find xs:list, xs:union or xs:restriction in xs:simpleType")
 
@@ -1170,585 +1869,285 @@ class XmlCodeGenerator:
 		return basic_def
 
 	def write_hdr_begin(self, hdr: TextIOBase, hdr_path: str):
-		inc_guard = os.path.basename(hdr_path).upper().replace(".", "_")
-		hdr.write("#ifndef {}\n".format(inc_guard))
-		hdr.write("#define {}\n\n".format(inc_guard))
-
-		if self.config.stdcompat:
-			hdr.write("#include \"optional.hpp\"\n")
-			hdr.write("#include \"variant.hpp\"\n")
+		config = self.config
+		cn = config.className
+		if config.stdcompat:
+			std_includes = "#include \"optional.hpp\"\n#include \"variant.hpp\"\n"
 		else:
-			hdr.write("#include <optional>\n")
-			hdr.write("#include <variant>\n")
-		hdr.write("#include <tuple>\n")
-		hdr.write("#include <exception>\n\n")
-
-		hdr.write("#include <QtCore/QString>\n")
-		hdr.write("#include <QtCore/QList>\n")
-		hdr.write("#include <QtCore/QFileDevice>\n")
-		hdr.write("#include <QtCore/QXmlStreamReader>\n")
-		hdr.write("#include <QtCore/QVariant>\n")
-		for include in self.config.includes:
-			if include.local:
-				hdr.write("#include \"{}\"\n".format(include.include))
-			else:
-				hdr.write("#include <{}>\n".format(include.include))
-		hdr.write("\n")
-
-		if self.config.ns != "":
-			hdr.write("namespace {} {{\n\n".format(self.config.ns))
-
-		hdr.write("class {}\n".format(self.config.prefix + " " + self.config.className if self.config.prefix != "" else self.config.className))
-		hdr.write("{\n")
-		hdr.write("\tQ_DISABLE_COPY({})\n".format(self.config.className))
-		hdr.write("public:\n")
-		if self.config.stdcompat:
-			hdr.write("\ttemplate <typename... TArgs>\n")
-			hdr.write("\tusing optional = nonstd::optional<TArgs...>;\n")
-			hdr.write("\ttemplate <typename... TArgs>\n")
-			hdr.write("\tusing variant = nonstd::variant<TArgs...>;\n")
-			hdr.write("\ttemplate <typename TGet, typename... TArgs>\n")
-			hdr.write("\tstatic inline Q_DECL_CONSTEXPR auto get(TArgs&&... args) -> decltype(nonstd::get<TGet>(std::forward<TArgs>(args)...)) {\n")
-			hdr.write("\t\treturn nonstd::get<TGet>(std::forward<TArgs>(args)...);\n")
-			hdr.write("\t}\n\n")
-		else:
-			hdr.write("\ttemplate <typename... TArgs>\n")
-			hdr.write("\tusing optional = std::optional<TArgs...>;\n")
-			hdr.write("\ttemplate <typename... TArgs>\n")
-			hdr.write("\tusing variant = std::variant<TArgs...>;\n")
-			hdr.write("\ttemplate <typename TGet, typename... TArgs>\n")
-			hdr.write("\tstatic inline Q_DECL_CONSTEXPR auto get(TArgs&&... args) -> decltype(std::get<TGet>(std::forward<TArgs>(args)...)) {\n")
-			hdr.write("\t\treturn std::get<TGet>(std::forward<TArgs>(args)...);\n")
-			hdr.write("\t}\n\n")
-
-		hdr.write("\tclass Exception : public std::exception\n")
-		hdr.write("\t{\n")
-		hdr.write("\tpublic:\n")
-		hdr.write("\t\tException();\n\n")
-		hdr.write("\t\tQString qWhat() const;\n")
-		hdr.write("\t\tconst char *what() const noexcept final;\n\n")
-		hdr.write("\tprotected:\n")
-		hdr.write("\t\tvirtual QString createQWhat() const = 0;\n\n")
-		hdr.write("\t\tmutable QByteArray _qWhat;\n")
-		hdr.write("\t};\n\n")
-
-		hdr.write("\tclass FileException : public Exception\n")
-		hdr.write("\t{\n")
-		hdr.write("\tpublic:\n")
-		hdr.write("\t\tFileException(QFileDevice &device);\n\n")
-		hdr.write("\t\tQString filePath() const;\n")
-		hdr.write("\t\tQString errorMessage() const;\n\n")
-		hdr.write("\tprotected:\n")
-		hdr.write("\t\tQString createQWhat() const override;\n\n")
-		hdr.write("\t\tconst QString _path;\n")
-		hdr.write("\t\tconst QString _error;\n")
-		hdr.write("\t};\n\n")
-
-		hdr.write("\tclass XmlException : public Exception\n")
-		hdr.write("\t{\n")
-		hdr.write("\tpublic:\n")
-		hdr.write("\t\tXmlException(QXmlStreamReader &reader, const QString &customError = {});\n")
-		hdr.write("\t\tXmlException(QString path, qint64 line, qint64 column, QString error);\n\n")
-		hdr.write("\t\tQString filePath() const;\n")
-		hdr.write("\t\tqint64 line() const;\n")
-		hdr.write("\t\tqint64 column() const;\n")
-		hdr.write("\t\tQString errorMessage() const;\n\n")
-		hdr.write("\tprotected:\n")
-		hdr.write("\t\tQString createQWhat() const override;\n\n")
-		hdr.write("\t\tconst QString _path;\n")
-		hdr.write("\t\tconst qint64 _line;\n")
-		hdr.write("\t\tconst qint64 _column;\n")
-		hdr.write("\t\tconst QString _error;\n")
-		hdr.write("\t};\n\n")
-
-		hdr.write("\t{}();\n".format(self.config.className))
-		hdr.write("\tvirtual ~{}();\n\n".format(self.config.className))
+			std_includes = "#include <optional>\n#include <variant>\n"
+		includes = "".join(f"#include \"{include.include}\"\n" if include.local else f"#include <{include.include}>\n" for include in config.includes)
+		hdr.write(_HDR_BEGIN_TEMPLATE.format(
+			inc_guard=os.path.basename(hdr_path).upper().replace(".", "_"),
+			std_includes=std_includes,
+			includes=includes,
+			ns_begin=f"namespace {config.ns} {{\n\n" if config.ns != "" else "",
+			class_decl=f"{config.prefix} {cn}" if config.prefix != "" else cn,
+			std_ns="nonstd" if config.stdcompat else "std",
+			cn=cn
+		))
 
 	def write_hdr__simple_types(self, hdr: TextIOBase, type_defs: list):
+		parts = []
 		for type_def in type_defs:
-			type_def.write_typedef(hdr)
+			type_def.write_typedef(parts)
+
+		_emit(parts, hdr)
 
 
 	def write_hdr_types(self, hdr: TextIOBase, type_defs: list):
-		if self.config.visibility is QxgConfig.Visibility.Private:
-			hdr.write("protected:\n")
+		parts = []
+		visibility = self.config.visibility
+		if visibility is QxgConfig.Visibility.Private:
+			parts.append("protected:\n")
 
 		has_predefs = False
 		for type_def in type_defs:
 			if type_def.declare:
 				has_predefs = True
-				hdr.write("\tstruct {};\n".format(type_def.name))
+				parts.append("\tstruct {};\n".format(type_def.name))
 		if has_predefs:
-			hdr.write("\n")
+			parts.append("\n")
 
 		for type_def in type_defs:
 			# write inherits
-			hdr.write("\tstruct " + type_def.name)
 			inh = type_def.inherits()
-			if len(inh) > 0:
-				hdr.write(" : public " + ", public ".join(inh))
-			hdr.write("\n\t{\n")
+			inh_str = " : public " + ", public ".join(inh) if len(inh) > 0 else ""
+			parts.append("\tstruct " + type_def.name + inh_str + "\n\t{\n")
 			# write attribs
-			for member in type_def.members:
-				if not member.required and member.default is None:
-					hdr.write("\t\toptional<{}> {};\n".format(member.cppType, member.member))
-				else:
-					hdr.write("\t\t{} {};\n".format(member.cppType, member.member))
-			for member in type_def.member_groups:
-				if not member.inherit:
-					hdr.write("\t\t{} {};\n".format(member.type_key, member.member))
+			parts.append("".join(member.declaration() for member in type_def.members))
+			parts.append("".join(f"\t\t{member.type_key} {member.member};\n" for member in type_def.member_groups if not member.inherit))
 			# write content
-			type_def.write_hdr_content(hdr)
+			type_def.write_hdr_content(parts)
 			#write end
-			hdr.write("\t};\n\n")
+			parts.append("\t};\n\n")
+
+		_emit(parts, hdr)
 
 	def write_hdr_methods(self, hdr: TextIOBase, type_defs: list, root_elements: list):
-		type_args = root_elements[0].generate_type() if len(root_elements) == 1 else "variant<{}>".format(", ".join(map(lambda t: t.generate_type(), root_elements)))
-		hdr.write("\tvirtual {} readDocument(QIODevice *device);\n".format(type_args))
-		hdr.write("\tvirtual {} readDocument(const QString &path);\n\n".format(type_args))
+		parts = []
+		root_types = [root.generate_type() for root in root_elements]
+		type_args = root_types[0] if len(root_types) == 1 else "variant<{}>".format(", ".join(root_types))
+		parts.append("\tvirtual {} readDocument(QIODevice *device);\n".format(type_args))
+		parts.append("\tvirtual {} readDocument(const QString &path);\n\n".format(type_args))
 
 		if self.config.visibility is QxgConfig.Visibility.Protected:
-			hdr.write("protected:\n")
+			parts.append("protected:\n")
 
 		for method in self.methods:
 			if method.as_group:
-				hdr.write("\tvirtual bool ")
+				parts.append("\tvirtual bool ")
 			else:
-				hdr.write("\tvirtual void ")
-			hdr.write("{}(QXmlStreamReader &reader, {} &data".format(method.name, method.type_key))
+				parts.append("\tvirtual void ")
+			parts.append("{}(QXmlStreamReader &reader, {} &data".format(method.name, method.type_key))
 			if method.as_group:
-				hdr.write(", bool hasNext")
+				parts.append(", bool hasNext")
 			for param in method.params:
-				hdr.write(", {} {}".format(param.type_key, param.name))
+				parts.append(", {} {}".format(param.type_key, param.name))
 				if param.default != "":
-					hdr.write(" = {}".format(param.default))
-			hdr.write(") = 0;\n")
+					parts.append(" = {}".format(param.default))
+			parts.append(") = 0;\n")
 		if len(self.methods) > 0:
-			hdr.write("\n")
+			parts.append("\n")
 
 		for type_def in type_defs:
-			if isinstance(type_def, GroupTypeDef):
-				hdr.write("\tvirtual bool read_{}(QXmlStreamReader &reader, {} &data, bool hasNext);\n".format(type_def.name, type_def.name))
-			elif isinstance(type_def, ComplexTypeDef):
-				hdr.write("\tvirtual void read_{}(QXmlStreamReader &reader, {} &data, bool keepElementOpen = false);\n".format(type_def.name, type_def.name))
-			else:
-				hdr.write("\tvirtual void read_{}(QXmlStreamReader &reader, {} &data);\n".format(type_def.name, type_def.name))
+			type_def.write_hdr_method_signature(parts)
+
+		_emit(parts, hdr)
 
 	def write_hdr_end(self, hdr: TextIOBase, simple_types: list):
-		hdr.write("\n\ttemplate <typename T>\n")
-		hdr.write("\tT convertData(QXmlStreamReader &reader, const QString &data) const;\n\n")
-
-		hdr.write("\ttemplate <typename T>\n")
-		hdr.write("\toptional<T> readOptionalAttrib(QXmlStreamReader &reader, const QString &key) const;\n")
-		hdr.write("\ttemplate <typename T>\n")
-		hdr.write("\tT readOptionalAttrib(QXmlStreamReader &reader, const QString &key, const QString &defaultValue) const;\n")
-		hdr.write("\ttemplate <typename T>\n")
-		hdr.write("\tT readRequiredAttrib(QXmlStreamReader &reader, const QString &key) const;\n\n")
-
-		hdr.write("\ttemplate <typename T>\n")
-		hdr.write("\tvoid readContent(QXmlStreamReader &reader, T &data) const;\n\n")
-
-		hdr.write("\tvoid checkError(QXmlStreamReader &reader) const;\n")
-		hdr.write("\tQ_NORETURN void throwChild(QXmlStreamReader &reader) const;\n")
-		hdr.write("\tQ_NORETURN void throwNoChild(QXmlStreamReader &reader) const;\n")
-		hdr.write("\tQ_NORETURN void throwInvalidSimple(QXmlStreamReader &reader) const;\n")
-		hdr.write("\tQ_NORETURN void throwSizeError(QXmlStreamReader &reader, int minValue, int currentValue, bool exactSize = false) const;\n")
-		hdr.write("\tQ_NORETURN void throwInvalidEnum(QXmlStreamReader &reader, const QString &text) const;\n")
-		hdr.write("};\n\n")
-
-		hdr.write("template <typename T>\n")
-		hdr.write("T {}::convertData(QXmlStreamReader &reader, const QString &data) const\n".format(self.config.className))
-		hdr.write("{\n")
-		hdr.write("\tQ_UNUSED(reader)\n")
-		hdr.write("\treturn QVariant{data}.template value<T>();\n")
-		hdr.write("}\n\n")
-
-		hdr.write("template <typename T>\n")
-		hdr.write("{}::optional<T> {}::readOptionalAttrib(QXmlStreamReader &reader, const QString &key) const\n".format(self.config.className, self.config.className))
-		hdr.write("{\n")
-		hdr.write("\tif(reader.attributes().hasAttribute(key))\n")
-		hdr.write("\t\treturn convertData<T>(reader, reader.attributes().value(key).toString());\n")
-		hdr.write("\telse\n")
-		hdr.write("\t\treturn optional<T>{};\n")
-		hdr.write("}\n\n")
-
-		hdr.write("template <typename T>\n")
-		hdr.write("T {}::readOptionalAttrib(QXmlStreamReader &reader, const QString &key, const QString &defaultValue) const\n".format(self.config.className))
-		hdr.write("{\n")
-		hdr.write("\tif(reader.attributes().hasAttribute(key))\n")
-		hdr.write("\t\treturn convertData<T>(reader, reader.attributes().value(key).toString());\n")
-		hdr.write("\telse\n")
-		hdr.write("\t\treturn convertData<T>(reader, defaultValue);\n")
-		hdr.write("}\n\n")
-
-		hdr.write("template <typename T>\n")
-		hdr.write("T {}::readRequiredAttrib(QXmlStreamReader &reader, const QString &key) const\n".format(self.config.className))
-		hdr.write("{\n")
-		hdr.write("\tif(reader.attributes().hasAttribute(key))\n")
-		hdr.write("\t\treturn convertData<T>(reader, reader.attributes().value(key).toString());\n")
-		hdr.write("\telse\n")
-		hdr.write("\t\tthrow XmlException{reader, QStringLiteral(\"Required attribute \\\"%1\\\" but was not set\").arg(key)};\n")
-		hdr.write("}\n\n")
-
-		hdr.write("template <typename T>\n")
-		hdr.write("void {}::readContent(QXmlStreamReader &reader, T &data) const\n".format(self.config.className))
-		hdr.write("{\n")
-		hdr.write("\tauto content = reader.readElementText(QXmlStreamReader::ErrorOnUnexpectedElement);\n")
-		hdr.write("\tcheckError(reader);\n")
-		hdr.write("\tdata = convertData<T>(reader, content);\n")
-		hdr.write("}\n\n")
-
-		for type_def in simple_types:
-			type_name = "{}::{}".format(self.config.className, type_def.name)
-			hdr.write("template <>\n")
-			hdr.write("{} {}::convertData<{}>(QXmlStreamReader &reader, const QString &data) const;\n\n".format(type_name, self.config.className, type_name))
+		cn = self.config.className
+		parts = [_HDR_END_TEMPLATE.format(cn=cn)]
+		if simple_types:
+			parts.extend(f"template <>\n{cn}::{type_def.name} {cn}::convertData<{cn}::{type_def.name}>(QXmlStreamReader &reader, const QString &data) const;\n\n" for type_def in simple_types)
 
 		if self.config.ns != "":
-			hdr.write("}\n\n")
-		hdr.write("#endif\n")
+			parts.append("}\n\n")
+		parts.append("#endif\n")
 
-	def write_src_begin(self, src: TextIOBase, hdr_path: str):
-		src.write("#include \"{}\"\n".format(os.path.basename(hdr_path)))
-		src.write("#include <QtCore/QFile>\n")
-		src.write("#include <QtCore/QSet>\n")
-		src.write("#if QT_CONFIG(regularexpression) == 1\n")
-		src.write("#include <QtCore/QRegularExpression>\n")
-		src.write("#define XML_CODE_GEN_REGEXP QRegularExpression\n")
-		src.write("#else\n")
-		src.write("#include <QtCore/QRegExp>\n")
-		src.write("#define XML_CODE_GEN_REGEXP QRegExp\n")
-		src.write("#endif\n")
-		if self.config.schemaUrl != "":
-			src.write("#ifdef QT_XMLPATTERNS_LIB\n")
-			src.write("#include <QtCore/QDebug>\n")
-			src.write("#include <QtCore/QBuffer>\n")
-			src.write("#include <QtXmlPatterns/QXmlSchema>\n")
-			src.write("#include <QtXmlPatterns/QXmlSchemaValidator>\n")
-			src.write("#include <QtXmlPatterns/QXmlQuery>\n")
-			src.write("#include <QtXmlPatterns/QAbstractMessageHandler>\n")
-			src.write("#endif\n")
-		if self.config.ns != "":
-			src.write("using namespace {};\n".format(self.config.ns))
+		_emit(parts, hdr)
 
-		if self.config.schemaUrl != "":
-			src.write("\n#ifdef QT_XMLPATTERNS_LIB\n")
-			src.write("namespace {\n\n")
-			src.write("class ExceptionMessageHandler : public QAbstractMessageHandler\n")
-			src.write("{\n")
-			src.write("public:\n")
-			src.write("\texplicit inline ExceptionMessageHandler(QObject *parent = nullptr) :\n")
-			src.write("\t\tQAbstractMessageHandler{parent}\n")
-			src.write("\t{}\n\n")
-			src.write("protected:\n")
-			src.write("\tvoid handleMessage(QtMsgType type, const QString &description, const QUrl &identifier, const QSourceLocation &sourceLocation) override\n")
-			src.write("\t{\n")
-			src.write("\t\tQ_UNUSED(identifier)\n")
-			src.write("\t\tauto msg = description;\n")
-			src.write("\t\tmsg.remove(XML_CODE_GEN_REGEXP{QStringLiteral(\"<[^>]*>\")});\n")
-			src.write("\t\t{}::XmlException exception{{sourceLocation.uri().isLocalFile() ? sourceLocation.uri().toLocalFile() : sourceLocation.uri().toString(), sourceLocation.line(), sourceLocation.column(), msg}};\n".format(self.config.className))
-			src.write("\t\tswitch(type) {\n")
-			src.write("\t\tcase QtDebugMsg:\n")
-			src.write("\t\t\tqDebug() << exception.what();\n")
-			src.write("\t\t\tbreak;\n")
-			src.write("\t\tcase QtInfoMsg:\n")
-			src.write("\t\t\tqInfo() << exception.what();\n")
-			src.write("\t\t\tbreak;\n")
-			src.write("\t\tcase QtWarningMsg:\n")
-			src.write("\t\t\tqWarning() << exception.what();\n")
-			src.write("\t\t\tbreak;\n")
-			src.write("\t\tdefault:\n")
-			src.write("\t\t\tthrow exception;\n")
-			src.write("\t\t}\n")
-			src.write("\t}\n")
-			src.write("};\n\n")
-			src.write("}\n")
-			src.write("#endif\n")
-
-		src.write("\n{}::{}() = default;\n\n".format(self.config.className, self.config.className))
-		src.write("{}::~{}() = default;\n\n".format(self.config.className, self.config.className))
+	def write_src_begin(self, src: TextIOBase, hdr_path: str):
+		cn = self.config.className
+		has_schema = self.config.schemaUrl != ""
+		src.write(_SRC_BEGIN_TEMPLATE.format(
+			hdr_name=os.path.basename(hdr_path),
+			schema_includes=_SRC_SCHEMA_INCLUDES if has_schema else "",
+			using_ns=f"using namespace {self.config.ns};\n" if self.config.ns != "" else "",
+			schema_handler=_SRC_SCHEMA_HANDLER_TEMPLATE.format(cn=cn) if has_schema else "",
+			cn=cn
+		))
 
 	def write_src_root(self, src: TextIOBase, root_elements: list):
-		if len(root_elements) == 1:
-			type_args = root_elements[0].generate_type()
+		cn = self.config.className
+		scope = f"{cn}::"
+		parts = []
+		root_types = [root.generate_type() for root in root_elements]
+		if len(root_types) == 1:
+			type_args = root_types[0]
 		else:
-			type_args = "variant<{}::{}>".format(self.config.className, ", {}::".format(self.config.className).join(map(lambda t: t.generate_type(), root_elements)))
+			type_args = f"variant<{scope}" + f", {scope}".join(root_types) + ">"
 
 		# device method
-		src.write("{}::{} {}::readDocument(QIODevice *device)\n".format(self.config.className, type_args, self.config.className))
-		src.write("{\n")
-		src.write("\tQ_ASSERT_X(device && device->isReadable(), Q_FUNC_INFO, \"Passed device must be open and readable\");\n")
-		src.write("\tQXmlStreamReader reader{device};\n")
-		src.write("\tif(!reader.readNextStartElement())\n")
-		src.write("\t\tthrow XmlException{reader};\n\n")
+		parts.append(f"{scope}{type_args} {scope}readDocument(QIODevice *device)\n")
+		parts.append("{\n")
+		parts.append("\tQ_ASSERT_X(device && device->isReadable(), Q_FUNC_INFO, \"Passed device must be open and readable\");\n")
+		parts.append("\tQXmlStreamReader reader{device};\n")
+		parts.append("\tif(!reader.readNextStartElement())\n")
+		parts.append("\t\tthrow XmlException{reader};\n\n")
 
 		is_first = True
-		for root in root_elements:
+		for root, root_type in zip(root_elements, root_types):
 			if is_first:
-				src.write("\t")
+				parts.append("\t")
 				is_first = False
 			else:
-				src.write(" else ")
-			src.write("if(reader.name() == QStringLiteral(\"{}\")) {{\n".format(root.name))
-			src.write("\t\t{} data;\n".format(root.generate_type()))
-			src.write("\t\t{}(reader, data{});\n".format(root.read_method(), root.read_method_params()))
-			src.write("\t\treturn data;\n")
-			src.write("\t}")
-		src.write(" else\n")
-		src.write("\t\tthrowChild(reader);\n")
-		src.write("}\n\n")
+				parts.append(" else ")
+			parts.append(f"if(reader.name() == QStringLiteral(\"{root.name}\")) {{\n")
+			parts.append(f"\t\t{root_type} data;\n")
+			parts.append(f"\t\t{root.read_method()}(reader, data{root.read_method_params()});\n")
+			parts.append("\t\treturn data;\n")
+			parts.append("\t}")
+		parts.append(" else\n")
+		parts.append("\t\tthrowChild(reader);\n")
+		parts.append("}\n\n")
 
 		# file method (the only one that can verify a pattern)
-		src.write("{}::{} {}::readDocument(const QString &path)\n".format(self.config.className, type_args, self.config.className))
-		src.write("{\n")
+		parts.append(f"{scope}{type_args} {scope}readDocument(const QString &path)\n")
+		parts.append("{\n")
 
 		if self.config.schemaUrl != "":
-			src.write("#ifdef QT_XMLPATTERNS_LIB\n")
-			src.write("\tQUrl schemaUrl{{QStringLiteral(\"{}\")}};\n".format(self.config.schemaUrl))
-			src.write("\tExceptionMessageHandler errorHandler;\n")
-			src.write("\tQBuffer xmlBuffer;\n")
-			src.write("\txmlBuffer.open(QIODevice::ReadWrite);\n\n")
-
-			src.write("\tQXmlQuery query(QXmlQuery::XSLT20);\n")
-			src.write("\tquery.setMessageHandler(&errorHandler);\n")
-			src.write("\tquery.setFocus(schemaUrl);\n")
-			src.write("\tquery.setQuery(QStringLiteral(R\"___({})___\"));\n".format(xslt_qxg_remove_query))
-			src.write("\tauto ok = query.evaluateTo(&xmlBuffer);\n")
-			src.write("\tQ_ASSERT(ok);\n\n")
-
-			src.write("\tQXmlSchema schema;\n")
-			src.write("\tschema.setMessageHandler(&errorHandler);\n")
-			src.write("\txmlBuffer.seek(0);\n")
-			src.write("\tok = schema.load(&xmlBuffer, schemaUrl);\n")
-			src.write("\tQ_ASSERT(ok);\n\n")
-
-			src.write("\tQXmlSchemaValidator validator;\n")
-			src.write("\tvalidator.setMessageHandler(&errorHandler);\n")
-			src.write("\tvalidator.setSchema(schema);\n")
-			src.write("\tok = validator.validate(QUrl::fromLocalFile(path));\n")
-			src.write("\tQ_ASSERT(ok);\n")
-			src.write("#endif\n\n")
-
-		src.write("\tQFile xmlFile{path};\n")
-		src.write("\tif(!xmlFile.open(QIODevice::ReadOnly | QIODevice::Text))\n")
-		src.write("\t\tthrow FileException{xmlFile};\n")
-		src.write("\treturn readDocument(&xmlFile);\n")
-		src.write("}\n\n")
+			parts.append("#ifdef QT_XMLPATTERNS_LIB\n")
+			parts.append(f"\tQUrl schemaUrl{{QStringLiteral(\"{self.config.schemaUrl}\")}};\n")
+			parts.append("\tExceptionMessageHandler errorHandler;\n")
+			parts.append("\tQBuffer xmlBuffer;\n")
+			parts.append("\txmlBuffer.open(QIODevice::ReadWrite);\n\n")
+
+			parts.append("\tQXmlQuery query(QXmlQuery::XSLT20);\n")
+			parts.append("\tquery.setMessageHandler(&errorHandler);\n")
+			parts.append("\tquery.setFocus(schemaUrl);\n")
+			parts.append(f"\tquery.setQuery(QStringLiteral(R\"___({xslt_qxg_remove_query})___\"));\n")
+			parts.append("\tauto ok = query.evaluateTo(&xmlBuffer);\n")
+			parts.append("\tQ_ASSERT(ok);\n\n")
+
+			parts.append("\tQXmlSchema schema;\n")
+			parts.append("\tschema.setMessageHandler(&errorHandler);\n")
+			parts.append("\txmlBuffer.seek(0);\n")
+			parts.append("\tok = schema.load(&xmlBuffer, schemaUrl);\n")
+			parts.append("\tQ_ASSERT(ok);\n\n")
+
+			parts.append("\tQXmlSchemaValidator validator;\n")
+			parts.append("\tvalidator.setMessageHandler(&errorHandler);\n")
+			parts.append("\tvalidator.setSchema(schema);\n")
+			parts.append("\tok = validator.validate(QUrl::fromLocalFile(path));\n")
+			parts.append("\tQ_ASSERT(ok);\n")
+			parts.append("#endif\n\n")
+
+		parts.append("\tQFile xmlFile{path};\n")
+		parts.append("\tif(!xmlFile.open(QIODevice::ReadOnly | QIODevice::Text))\n")
+		parts.append("\t\tthrow FileException{xmlFile};\n")
+		parts.append("\treturn readDocument(&xmlFile);\n")
+		parts.append("}\n\n")
+
+		_emit(parts, src)
 
 	def write_src_types(self, src: TextIOBase, type_defs: list):
+		parts = []
+		cn = self.config.className
 		for type_def in type_defs:
-			if isinstance(type_def, GroupTypeDef):
-				src.write("bool {}::read_{}(QXmlStreamReader &reader, {} &data, bool hasNext)\n".format(self.config.className, type_def.name, type_def.name))
-			elif isinstance(type_def, ComplexTypeDef):
-				src.write("void {}::read_{}(QXmlStreamReader &reader, {} &data, bool keepElementOpen)\n".format(self.config.className, type_def.name, type_def.name))
-			else:
-				src.write("void {}::read_{}(QXmlStreamReader &reader, {} &data)\n".format(self.config.className, type_def.name, type_def.name))
-			src.write("{\n")
+			type_def.write_src_method_signature(parts, cn)
+			parts.append("{\n")
 
 			# write attribs
 			need_newline = len(type_def.members) > 0
 			for member in type_def.members:
-				if member.required:
-					src.write("\tdata.{} = readRequiredAttrib<{}>(reader, QStringLiteral(\"{}\"));\n".format(member.member, member.cppType, member.name))
-				else:
-					src.write("\tdata.{} = readOptionalAttrib<{}>(reader, QStringLiteral(\"{}\")".format(member.member, member.cppType, member.name))
-					if member.default is not None:
-						src.write(", QStringLiteral(\"{}\")".format(member.default))
-					src.write(");\n")
+				parts.append(member.read_statement())
 
 			# write attrib grps
 			if len(type_def.member_groups) > 0:
 				if need_newline:
-					src.write("\n")
+					parts.append("\n")
 				need_newline = True
 			for member in type_def.member_groups:
 				if member.inherit:
-					src.write("\tread_{}(reader, data);\n".format(member.type_key))
+					parts.append("\tread_{}(reader, data);\n".format(member.type_key))
 				else:
-					src.write("\tread_{}(reader, data.{});\n".format(member.type_key, member.member))
+					parts.append("\tread_{}(reader, data.{});\n".format(member.type_key, member.member))
 
 			# write content
-			type_def.write_src_content(src, need_newline)
+			type_def.write_src_content(parts, need_newline)
+
+			parts.append("}\n\n")
 
-			src.write("}\n\n")
+		_emit(parts, src)
 
 	def write_src_end(self, src: TextIOBase, simple_types: list):
-		src.write("void {}::checkError(QXmlStreamReader &reader) const\n".format(self.config.className))
-		src.write("{\n")
-		src.write("\tif(reader.hasError())\n")
-		src.write("\t\tthrow XmlException{reader};\n")
-		src.write("}\n\n")
-
-		src.write("void {}::throwChild(QXmlStreamReader &reader) const\n".format(self.config.className))
-		src.write("{\n")
-		src.write("\tthrow XmlException{reader, QStringLiteral(\"Unexpected child element: %1\").arg(reader.name())};\n")
-		src.write("}\n\n")
-
-		src.write("void {}::throwNoChild(QXmlStreamReader &reader) const\n".format(self.config.className))
-		src.write("{\n")
-		src.write("\tthrow XmlException{reader, QStringLiteral(\"Unexpected end of element \\\"%1\\\". Expected more child elements\").arg(reader.name())};\n")
-		src.write("}\n\n")
-
-		src.write("void {}::throwInvalidSimple(QXmlStreamReader &reader) const\n".format(self.config.className))
-		src.write("{\n")
-		src.write("\tthrow XmlException{reader, QStringLiteral(\"Mixed content elements with a base class cannot have the base read any content\")};\n")
-		src.write("}\n\n")
-
-		src.write("void {}::throwSizeError(QXmlStreamReader &reader, int minValue, int currentValue, bool exactSize) const\n".format(self.config.className))
-		src.write("{\n")
-		src.write("\tthrow XmlException{reader, QStringLiteral(\"Expected %1 %2 child elements, but found %3\")\n")
-		src.write("\t\t.arg(exactSize ? QStringLiteral(\"exactly\") : QStringLiteral(\"at least\"))\n")
-		src.write("\t\t.arg(minValue)\n")
-		src.write("\t\t.arg(currentValue)\n")
-		src.write("\t};\n")
-		src.write("}\n\n")
-
-		src.write("void {}::throwInvalidEnum(QXmlStreamReader &reader, const QString &text) const\n".format(self.config.className))
-		src.write("{\n")
-		src.write("\tthrow XmlException{reader, QStringLiteral(\"Found unexpected value \\\"%1\\\" for restricted enum\").arg(text)};\n")
-		src.write("}\n\n")
-
-		for type_def in simple_types:
-			type_name = "{}::{}".format(self.config.className, type_def.name)
-			src.write("template <>\n")
-			src.write("{} {}::convertData<{}>(QXmlStreamReader &reader, const QString &data) const\n".format(type_name, self.config.className, type_name))
-			src.write("{\n")
-			type_def.write_converter(src)
-			src.write("}\n\n")
-
-		src.write("\n\n{}::Exception::Exception() = default;\n\n".format(self.config.className))
-
-		src.write("QString {}::Exception::qWhat() const\n".format(self.config.className))
-		src.write("{\n")
-		src.write("\tif(_qWhat.isNull())\n")
-		src.write("\t\t _qWhat = createQWhat().toUtf8();\n")
-		src.write("\treturn QString::fromUtf8(_qWhat);\n")
-		src.write("}\n\n")
-
-		src.write("const char *{}::Exception::what() const noexcept\n".format(self.config.className))
-		src.write("{\n")
-		src.write("\tif(_qWhat.isNull())\n")
-		src.write("\t\t _qWhat = createQWhat().toUtf8();\n")
-		src.write("\treturn _qWhat.constData();\n")
-		src.write("}\n\n\n\n")
-
-		src.write("{}::FileException::FileException(QFileDevice &device) :\n".format(self.config.className))
-		src.write("\tException{},\n")
-		src.write("\t_path{device.fileName()},\n")
-		src.write("\t_error{device.errorString()}\n")
-		src.write("{}\n\n")
-
-		src.write("QString {}::FileException::filePath() const\n".format(self.config.className))
-		src.write("{\n")
-		src.write("\treturn _path;\n")
-		src.write("}\n\n")
-
-		src.write("QString {}::FileException::errorMessage() const\n".format(self.config.className))
-		src.write("{\n")
-		src.write("\treturn _error;\n")
-		src.write("}\n\n")
-
-		src.write("QString {}::FileException::createQWhat() const\n".format(self.config.className))
-		src.write("{\n")
-		src.write("\treturn QStringLiteral(\"%1: %2\").arg(_path, _error);\n")
-		src.write("}\n\n\n\n")
-
-		src.write("{}::XmlException::XmlException(QXmlStreamReader &reader, const QString &customError) :\n".format(self.config.className))
-		src.write("\tException{},\n")
-		src.write("\t_path{dynamic_cast<QFileDevice*>(reader.device()) ? static_cast<QFileDevice*>(reader.device())->fileName() : QStringLiteral(\"<unknown>\")},\n")
-		src.write("\t_line{reader.lineNumber()},\n")
-		src.write("\t_column{reader.columnNumber()},\n")
-		src.write("\t_error{customError.isNull() ? reader.errorString() : customError}\n")
-		src.write("{}\n\n")
-
-		src.write("{}::XmlException::XmlException(QString path, qint64 line, qint64 column, QString error) :\n".format(self.config.className))
-		src.write("\tException{},\n")
-		src.write("\t_path{std::move(path)},\n")
-		src.write("\t_line{std::move(line)},\n")
-		src.write("\t_column{std::move(column)},\n")
-		src.write("\t_error{std::move(error)}\n")
-		src.write("{}\n\n")
-
-		src.write("QString {}::XmlException::filePath() const\n".format(self.config.className))
-		src.write("{\n")
-		src.write("\treturn _path;\n")
-		src.write("}\n\n")
-
-		src.write("qint64 {}::XmlException::line() const\n".format(self.config.className))
-		src.write("{\n")
-		src.write("\treturn _line;\n")
-		src.write("}\n\n")
-
-		src.write("qint64 {}::XmlException::column() const\n".format(self.config.className))
-		src.write("{\n")
-		src.write("\treturn _column;\n")
-		src.write("}\n\n")
-
-		src.write("QString {}::XmlException::errorMessage() const\n".format(self.config.className))
-		src.write("{\n")
-		src.write("\treturn _error;\n")
-		src.write("}\n\n")
-
-		src.write("QString {}::XmlException::createQWhat() const\n".format(self.config.className))
-		src.write("{\n")
-		src.write("\treturn QStringLiteral(\"%1:%2:%3: %4\").arg(_path).arg(_line).arg(_column).arg(_error);\n")
-		src.write("}\n")
+		cn = self.config.className
+		parts = [_SRC_ERROR_MESSAGE_TABLE, _SRC_END_HELPERS_TEMPLATE.format(cn=cn)]
+		if simple_types:
+			append = parts.append
+			for type_def in simple_types:
+				append(_SRC_CONVERTER_BEGIN_TEMPLATE.format(cn=cn, tn=type_def.name))
+				type_def.write_converter(parts)
+				append("}\n\n")
+		parts.append(_SRC_END_TEMPLATE.format(cn=cn))
+		_emit(parts, src)
 
 	def xmlcodegen(self, xsd_path: str, hdr_path: str, src_path: str, verify: bool = True):
+		# read the document only once, even if it is both verified and parsed
+		with open(xsd_path, "rb") as xsd_file:
+			xsd_data = xsd_file.read()
 		if verify:
-			xml_verify(xsd_path)
-
-		# parse the document and verify it's a schema
-		xsd = parse(xsd_path)
-		root = xsd.getroot()
-		self.ns_map["xs"] = root.tag[1:root.tag.index('}')]
-		# read config
-		conf_node = root.find("qxg:config", namespaces=self.ns_map)
-		if conf_node is None:
-			self.config = QxgConfig(xsd_path)
-		else:
-			self.read_config(conf_node)
+			xml_verify(xsd_path, xsd_data=xsd_data)
+
+		# default config, replaced if the document contains a qxg:config
+		self.config = QxgConfig(xsd_path)
+
+		# stream the document and read each top level definition as soon as it is complete
+		top_level_readers = self.top_level_readers
+		context = iterparse(BytesIO(xsd_data), events=("start", "end"))
+		_, root = next(context)
+		self.ns_map["xs"] = sys.intern(root.tag[1:root.tag.index('}')])
+		self.compile_xpaths()
+		depth = 1
+		for event, child in context:
+			if event == "start":
+				depth += 1
+				continue
+			depth -= 1
+			if depth != 1:
+				continue
 
-		# read type definitions
-		type_defs = []
-		simple_types = []
-		root_elements = []
-		for child in root:
 			xtag = self.ns_replace(child.tag)
-			if xtag == "xs:complexType":
-				type_def = self.read_type(child)
-				if isinstance(type_def, SimpleTypeDef):
-					self.xs_type_map[type_def.name] = type_def.name
-					self.xs_cpp_base_types.add(type_def.name)
-				type_defs.append(type_def)
-			elif xtag == "xs:element":
-				root_elements.append(self.read_type_content(child))
-			elif xtag == "xs:group":
-				type_defs.append(self.read_group(child))
-			elif xtag == "xs:attributeGroup":
-				type_defs.append(self.read_attr_group(child))
-			elif xtag == "xs:simpleType":
-				s_type = self.read_simple_type(child)
-				simple_types.append(s_type)
-				self.xs_type_map[s_type.name] = s_type.name
-			elif xtag == "qxg:method":
-				self.methods.append(self.read_method(child))
-			elif xtag[0:4] == "qxg:":
-				pass
-			else:
+			top_level_reader = top_level_readers.get(xtag)
+			if top_level_reader is not None:
+				top_level_reader(child)
+			elif xtag[0:4] != "qxg:":
 				raise Exception("XSD-Type {} is not supported as top level element".format(xtag))
 
-		with open(hdr_path, "w") as hdr:
-			self.write_hdr_begin(hdr, hdr_path)
-			self.write_hdr__simple_types(hdr, simple_types)
-			self.write_hdr_types(hdr, type_defs)
-			self.write_hdr_methods(hdr, type_defs, root_elements)
-			self.write_hdr_end(hdr, simple_types)
-
-		with open(src_path, "w") as src:
-			self.write_src_begin(src, hdr_path)
-			self.write_src_root(src, root_elements)
-			self.write_src_types(src, type_defs)
-			self.write_src_end(src, simple_types)
+			# the definition has been read completely, so it can be dropped from the tree
+			child.clear()
+			root.remove(child)
+
+		self.write_hdr(hdr_path, self.simple_types, self.type_defs, self.root_elements)
+		self.write_src(src_path, hdr_path, self.simple_types, self.type_defs, self.root_elements)
+
+	def write_hdr(self, hdr_path: str, simple_types: list, type_defs: list, root_elements: list):
+		# assemble the file in memory, then encode and write it in one go
+		hdr = StringIO()
+		self.write_hdr_begin(hdr, hdr_path)
+		self.write_hdr__simple_types(hdr, simple_types)
+		self.write_hdr_types(hdr, type_defs)
+		self.write_hdr_methods(hdr, type_defs, root_elements)
+		self.write_hdr_end(hdr, simple_types)
+		_write_file(hdr_path, hdr.getvalue().encode("utf-8"))
+
+	def write_src(self, src_path: str, hdr_path: str, simple_types: list, type_defs: list, root_elements: list):
+		src = StringIO()
+		self.write_src_begin(src, hdr_path)
+		self.write_src_root(src, root_elements)
+		self.write_src_types(src, type_defs)
+		self.write_src_end(src, simple_types)
+		_write_file(src_path, src.getvalue().encode("utf-8"))
 
 
 if __name__ == '__main__':